@@ -1,18 +1,503 @@
 import asyncio
+import bisect
+import contextlib
+import csv
 import discord
+import functools
+import gzip
+import heapq
+import itertools
+import json
+import math
+import os
 import random
+import time
 import calendar
 import typing
 import datetime
 
 from redbot.core import Config, checks, commands, bank, errors
+from redbot.core.data_manager import cog_data_path
 from redbot.core.utils.chat_formatting import pagify, box
-from redbot.core.utils.predicates import MessagePredicate
-from redbot.core.utils.menus import menu, DEFAULT_CONTROLS
+from redbot.core.utils.predicates import MessagePredicate, ReactionPredicate
+from redbot.core.utils.menus import start_adding_reactions
 
 from redbot.core.bot import Red
 
 _MAX_BALANCE = 2 ** 63 - 1
+_PAGE_SIZE = 10  # leaderboard entries per page
+_LOCK_STRIPES = 64  # account locks, accounts are spread over them by hash
+_SNAPSHOT_INTERVAL = 60  # seconds between cooldown snapshots
+_REMINDER_BATCH = 25  # reminders sent at once
+_REMINDER_MAX_SLEEP = 300  # seconds, the reminder loop wakes up at least this often
+_COMPACT_INTERVAL = 300  # seconds between writing journaled balances to Config
+_JOURNAL_SEGMENTS = 50  # compacted journal files kept for history
+_READ_CHUNK = 8192  # bytes read at once when reading the journal backwards
+_INTEREST_CHECK = 60  # seconds between checks for due interest
+_EXPORT_FIELDS = ("guild_id", "user_id", "cookies")  # guild_id is 0 for global balances
+_EXPORT_FORMATS = (".csv", ".csv.gz", ".jsonl", ".jsonl.gz")
+_EXPORT_CHUNK = 5000  # rows written to an export file at once
+
+
+def _read_lines_backwards(path: str) -> typing.Iterator[str]:
+    """Yield the lines of a file from the last one, reading it in chunks."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        rest = b""
+        while position > 0:
+            size = min(_READ_CHUNK, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + rest).split(b"\n")
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode("utf-8")
+        if rest:
+            yield rest.decode("utf-8")
+
+
+def _read_history(paths: typing.List[str], user_id: int, limit: int) -> typing.List[dict]:
+    """The latest journal entries of a user, newest first, from files given newest first."""
+    needle = f'"u":{user_id},'
+    entries = []
+    for path in paths:
+        try:
+            for line in _read_lines_backwards(path):
+                if needle not in line:
+                    continue
+                entry = json.loads(line)
+                if entry["k"] != "carry":
+                    entries.append(entry)
+                if len(entries) >= limit:
+                    return entries
+        except FileNotFoundError:
+            continue  # archived or dropped by a compaction in the meantime
+    return entries
+
+
+def _read_journal(path: str) -> typing.Dict[typing.Optional[int], typing.Dict[int, int]]:
+    """Scope -> user ID -> latest balance in a journal file."""
+    unsaved = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # the last line may have been cut off
+                unsaved.setdefault(entry["s"] or None, {})[entry["u"]] = entry["b"]
+    except FileNotFoundError:
+        pass
+    return unsaved
+
+
+def _export_format(path: str) -> str:
+    """".csv" or ".jsonl", from the extension of a file that may be gzipped."""
+    path = path.lower()
+    if path.endswith(".gz"):
+        path = path[:-3]
+    return os.path.splitext(path)[1]
+
+
+def _write_export(path: str, scope: typing.Optional[int], balances: typing.Dict[int, int]) -> int:
+    """Write the non-zero balances to a gzipped CSV or JSONL file, depending on the path.
+
+    Rows are written in chunks. Returns how many were written."""
+    rows = ((scope or 0, user_id, balance) for user_id, balance in balances.items() if balance)
+    is_csv = _export_format(path) == ".csv"
+    written = 0
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        if is_csv:
+            writer = csv.writer(f)
+            writer.writerow(_EXPORT_FIELDS)
+        while True:
+            chunk = list(itertools.islice(rows, _EXPORT_CHUNK))
+            if not chunk:
+                return written
+            written += len(chunk)
+            if is_csv:
+                writer.writerows(chunk)
+            else:
+                f.writelines(json.dumps(dict(zip(_EXPORT_FIELDS, row))) + "\n" for row in chunk)
+
+
+def _read_export(path: str) -> typing.Iterator[typing.Tuple[int, int, int]]:
+    """Yield (guild ID, user ID, balance) from a file made by `_write_export`.
+
+    Raises `ValueError` on the first invalid line."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        if _export_format(path) == ".csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for line, row in enumerate(rows, 1):
+            try:
+                guild_id, user_id, balance = (int(row[field]) for field in _EXPORT_FIELDS)
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Row {line} is invalid.")
+            if not 0 <= balance <= _MAX_BALANCE:
+                raise ValueError(f"Row {line} has a balance out of range.")
+            yield guild_id, user_id, balance
+
+
+def _load_import(
+    path: str, scope: typing.Optional[int], convert: bool
+) -> typing.Tuple[typing.Dict[int, int], int]:
+    """Balances of a file for a scope, and how many rows are from another scope.
+
+    With `convert`, balances of other scopes are used too;
+    when going from members to users, the balances of a user are summed."""
+    balances = {}
+    skipped = 0
+    for guild_id, user_id, balance in _read_export(path):
+        if guild_id == (scope or 0):
+            balances[user_id] = balance
+        elif not convert or (scope and guild_id):
+            skipped += 1  # another guild's balance, or not converting
+        elif scope is None:
+            balances[user_id] = min(balances.get(user_id, 0) + balance, _MAX_BALANCE)
+        else:
+            balances[user_id] = balance
+    return balances, skipped
+
+
+_PREVIOUS = "\N{LEFTWARDS BLACK ARROW}\N{VARIATION SELECTOR-16}"
+_CLOSE = "\N{CROSS MARK}"
+_NEXT = "\N{BLACK RIGHTWARDS ARROW}\N{VARIATION SELECTOR-16}"
+
+
+class BalanceIndex:
+    """Balances of one scope (a guild, or every user in global mode).
+
+    Visible accounts with a positive balance are kept sorted from the
+    richest, so ranks and leaderboard pages are found with a bisection.
+    Hidden accounts (members that left) keep their balance but aren't ranked."""
+
+    __slots__ = ("balances", "_hidden", "_ranking")
+
+    def __init__(
+        self, balances: typing.Dict[int, int], hidden: typing.Iterable[int] = ()
+    ):
+        self.balances = balances
+        self._hidden = set(hidden)
+        self._ranking = sorted(
+            (-balance, user_id)
+            for user_id, balance in balances.items()
+            if balance > 0 and user_id not in self._hidden
+        )
+
+    def __len__(self):
+        return len(self._ranking)
+
+    def get(self, user_id: int) -> int:
+        return self.balances.get(user_id, 0)
+
+    def set(self, user_id: int, balance: int):
+        self._unrank(user_id)
+        self.balances[user_id] = balance
+        self._rank(user_id)
+
+    def remove(self, user_id: int):
+        self._unrank(user_id)
+        self.balances.pop(user_id, None)
+        self._hidden.discard(user_id)
+
+    def hide(self, user_id: int):
+        self._unrank(user_id)
+        self._hidden.add(user_id)
+
+    def show(self, user_id: int):
+        if user_id in self._hidden:
+            self._hidden.remove(user_id)
+            self._rank(user_id)
+
+    def rank(self, user_id: int) -> typing.Optional[int]:
+        balance = self.balances.get(user_id, 0)
+        if balance <= 0 or user_id in self._hidden:
+            return None
+        return bisect.bisect_left(self._ranking, (-balance, user_id)) + 1
+
+    def page(self, start: int, stop: int) -> typing.List[typing.Tuple[int, int]]:
+        return [(user_id, -balance) for balance, user_id in self._ranking[start:stop]]
+
+    def filtered_page(
+        self, cursor: int, count: int, predicate: typing.Callable[[int], bool]
+    ) -> typing.Tuple[typing.List[typing.Tuple[int, int]], int]:
+        """The next `count` accounts matching `predicate`, starting at rank `cursor` (from 0).
+
+        Also returns the cursor to continue from."""
+        entries = []
+        for i in range(cursor, len(self._ranking)):
+            balance, user_id = self._ranking[i]
+            if predicate(user_id):
+                entries.append((user_id, -balance))
+                if len(entries) == count:
+                    return entries, i + 1
+        return entries, len(self._ranking)
+
+    def _rank(self, user_id: int):
+        balance = self.balances.get(user_id, 0)
+        if balance > 0 and user_id not in self._hidden:
+            bisect.insort(self._ranking, (-balance, user_id))
+
+    def _unrank(self, user_id: int):
+        key = (-self.balances.get(user_id, 0), user_id)
+        i = bisect.bisect_left(self._ranking, key)
+        if i < len(self._ranking) and self._ranking[i] == key:
+            del self._ranking[i]
+
+
+class VictimPool:
+    """Members of a guild that can be stolen from, i.e. present and with cookies.
+
+    Members are kept in a list for O(1) uniform sampling and their balances
+    in a Fenwick tree for O(log n) sampling weighted by balance."""
+
+    __slots__ = ("_ids", "_positions", "_weights", "_tree")
+
+    def __init__(self, balances: typing.Dict[int, int]):
+        self._ids: typing.List[int] = []
+        self._positions: typing.Dict[int, int] = {}
+        self._weights: typing.List[int] = []
+        self._tree: typing.List[int] = [0]
+        for user_id, balance in balances.items():
+            self.update(user_id, balance)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def update(self, user_id: int, balance: int):
+        if balance <= 0:
+            return self.discard(user_id)
+        i = self._positions.get(user_id)
+        if i is None:
+            i = self._positions[user_id] = len(self._ids)
+            self._ids.append(user_id)
+            self._weights.append(0)
+            self._grow()
+        self._add(i, balance - self._weights[i])
+        self._weights[i] = balance
+
+    def discard(self, user_id: int):
+        i = self._positions.pop(user_id, None)
+        if i is None:
+            return
+        last = len(self._ids) - 1
+        self._add(i, -self._weights[i])
+        if i != last:
+            # move the last member into the freed slot
+            moved, weight = self._ids[last], self._weights[last]
+            self._add(last, -weight)
+            self._add(i, weight)
+            self._ids[i], self._weights[i] = moved, weight
+            self._positions[moved] = i
+        self._ids.pop()
+        self._weights.pop()
+        self._tree.pop()
+
+    def choice(self, exclude: typing.Optional[int] = None) -> typing.Optional[int]:
+        n = len(self._ids)
+        excluded = self._positions.get(exclude)
+        if excluded is None:
+            return self._ids[random.randrange(n)] if n else None
+        if n <= 1:
+            return None
+        i = random.randrange(n - 1)
+        return self._ids[i + 1 if i >= excluded else i]
+
+    def weighted_choice(self, exclude: typing.Optional[int] = None) -> typing.Optional[int]:
+        excluded = self._positions.get(exclude)
+        total = self._prefix(len(self._ids))
+        if excluded is not None:
+            total -= self._weights[excluded]
+        if total <= 0:
+            return None
+        target = random.randrange(total)
+        if excluded is not None and target >= self._prefix(excluded):
+            # skip over the excluded member's share
+            target += self._weights[excluded]
+        return self._ids[self._search(target)]
+
+    def _grow(self):
+        # the new node covers the range ending at it
+        i = len(self._tree)
+        total = 0
+        j = i - 1
+        while j > i - (i & -i):
+            total += self._tree[j]
+            j -= j & -j
+        self._tree.append(total)
+
+    def _add(self, i: int, delta: int):
+        i += 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, i: int) -> int:
+        """Sum of the first `i` weights."""
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _search(self, target: int) -> int:
+        """Position of the member whose share contains `target`."""
+        pos = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+
+class RewardSampler:
+    """Draws random cookie amounts in O(1) time and memory.
+
+    - `uniform`: any amount between `minimum` and `maximum`
+    - `geometric`: `minimum` plus the amount of failed tries with a `ratio` chance
+      of success, so small rewards are common, capped at `maximum`
+    - `weighted`: a bucket chosen with an alias table by its weight,
+      then any amount inside of it"""
+
+    __slots__ = ("distribution", "minimum", "maximum", "ratio", "buckets", "_prob", "_alias")
+
+    def __init__(
+        self,
+        distribution: str,
+        minimum: int,
+        maximum: int,
+        ratio: float = 0.5,
+        buckets: typing.Sequence[typing.Sequence[int]] = (),
+    ):
+        self.distribution = distribution
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.ratio = ratio
+        self.buckets = [tuple(bucket) for bucket in buckets]
+        self._prob, self._alias = self._alias_table(
+            [weight for _, _, weight in self.buckets]
+        )
+
+    def sample(self) -> int:
+        if self.distribution == "weighted" and self.buckets:
+            i = random.randrange(len(self.buckets))
+            if random.random() >= self._prob[i]:
+                i = self._alias[i]
+            low, high, _ = self.buckets[i]
+            return random.randint(low, high)
+        if self.distribution == "geometric" and 0 < self.ratio < 1:
+            # inverse transform sampling, 1 - random() is never 0
+            tries = int(math.log(1 - random.random()) / math.log(1 - self.ratio))
+            return min(self.minimum + tries, self.maximum)
+        return random.randint(self.minimum, self.maximum)
+
+    def describe(self) -> str:
+        if self.distribution == "weighted" and self.buckets:
+            total = sum(weight for _, _, weight in self.buckets)
+            return "random amount from weighted buckets: " + ", ".join(
+                f"{low}-{high} ({weight / total:.0%})" for low, high, weight in self.buckets
+            )
+        if self.distribution == "geometric":
+            return (
+                f"random amount between {self.minimum} and {self.maximum}, "
+                f"each extra cookie with a {1 - self.ratio:.0%} chance"
+            )
+        return f"random amount between {self.minimum} and {self.maximum}"
+
+    @staticmethod
+    def _alias_table(
+        weights: typing.List[int],
+    ) -> typing.Tuple[typing.List[float], typing.List[int]]:
+        """Vose's alias method."""
+        n = len(weights)
+        total = sum(weights)
+        if not n or total <= 0:
+            return [], []
+        prob = [weight * n / total for weight in weights]
+        alias = list(range(n))
+        small = [i for i, p in enumerate(prob) if p < 1]
+        large = [i for i, p in enumerate(prob) if p >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            alias[less] = more
+            prob[more] += prob[less] - 1
+            (small if prob[more] < 1 else large).append(more)
+        for i in small + large:
+            prob[i] = 1.0
+        return prob, alias
+
+
+class CookieSnapshot:
+    """Reads balances with the cookie mode (global or per-guild) of one moment.
+
+    Made by `Cookies.snapshot()`, so many balances can be read
+    without checking the mode each time."""
+
+    __slots__ = ("_cog", "is_global")
+
+    def __init__(self, cog: "Cookies", is_global: bool):
+        self._cog = cog
+        self.is_global = is_global
+
+    async def get(self, user) -> int:
+        return (await self._cog._get_account_index(user, self.is_global)).get(user.id)
+
+    async def get_many(self, users: typing.Iterable) -> typing.Dict[int, int]:
+        """User ID -> balance of every user."""
+        balances = {}
+        for user in users:
+            index = await self._cog._get_account_index(user, self.is_global)
+            balances[user.id] = index.get(user.id)
+        return balances
+
+    async def can_spend_many(self, users: typing.Iterable, amount: int) -> bool:
+        """Whether every user can spend `amount`."""
+        return all(balance >= amount for balance in (await self.get_many(users)).values())
+
+
+async def _lazy_menu(
+    ctx: commands.Context,
+    page_count: int,
+    get_page: typing.Callable[[int], typing.Awaitable[typing.Union[str, discord.Embed]]],
+    timeout: float = 30.0,
+):
+    """Like redbot's menu, but a page is only rendered once it's displayed."""
+    page = 0
+    content = await get_page(page)
+    kwargs = {"embed": content} if isinstance(content, discord.Embed) else {"content": content}
+    message = await ctx.send(**kwargs)
+    if page_count <= 1:
+        return
+    emojis = [_PREVIOUS, _CLOSE, _NEXT]
+    start_adding_reactions(message, emojis)
+    while True:
+        pred = ReactionPredicate.with_emojis(emojis, message, ctx.author)
+        try:
+            await ctx.bot.wait_for("reaction_add", check=pred, timeout=timeout)
+        except asyncio.TimeoutError:
+            try:
+                await message.clear_reactions()
+            except (discord.Forbidden, discord.NotFound):
+                pass
+            return
+        if emojis[pred.result] == _CLOSE:
+            return await message.delete()
+        page = (page + pred.result - 1) % page_count
+        try:
+            await message.remove_reaction(emojis[pred.result], ctx.author)
+        except (discord.Forbidden, discord.NotFound):
+            pass
+        content = await get_page(page)
+        kwargs = {"embed": content} if isinstance(content, discord.Embed) else {"content": content}
+        await message.edit(**kwargs)
 
 
 class Cookies(commands.Cog):
@@ -20,7 +505,7 @@ class Cookies(commands.Cog):
     Collect cookies and steal from others.
     """
 
-    __version__ = "1.2.3"
+    __version__ = "1.4.0"
 
     def __init__(self, bot: Red):
         self.bot = bot
@@ -31,20 +516,36 @@ class Cookies(commands.Cog):
             amount=1,
             minimum=0,
             maximum=0,
+            distribution="uniform",
+            ratio=0.5,
+            buckets=[],  # [[low, high, weight], ...]
             cooldown=43200,
             stealing=False,
             stealcd=43200,
+            stealweighted=False,
             rate=0.5,
+            interest=0.0,  # % of the balance, negative for decay
+            interestcd=86400,
+            nextinterest=0,
         )
         self.config.register_global(
+            # {'guild_id' or 'global': {'user_id': [next_cookie, next_steal, remind]}}
+            cooldowns={},
             is_global=False,
             amount=1,
             minimum=0,
             maximum=0,
+            distribution="uniform",
+            ratio=0.5,
+            buckets=[],  # [[low, high, weight], ...]
             cooldown=43200,
             stealing=False,
             stealcd=43200,
+            stealweighted=False,
             rate=0.5,
+            interest=0.0,  # % of the balance, negative for decay
+            interestcd=86400,
+            nextinterest=0,
         )
 
         self.config.register_member(cookies=0, next_cookie=0, next_steal=0)
@@ -52,10 +553,89 @@ class Cookies(commands.Cog):
 
         self.config.register_role(cookies=0, multiplier=1)
 
+        # guild ID (or None in global mode) -> balances, loaded on first use
+        self._indexes: typing.Dict[typing.Optional[int], BalanceIndex] = {}
+        # guild ID -> members that can be stolen from, loaded on first use
+        self._pools: typing.Dict[int, VictimPool] = {}
+        self._locks = [asyncio.Lock() for _ in range(_LOCK_STRIPES)]
+        # role ID -> (multiplier, cookies), only roles that have been configured
+        self._role_table: typing.Optional[typing.Dict[int, typing.Tuple[int, int]]] = None
+        # guild ID (or None in global mode) -> user ID -> [next_cookie, next_steal, remind]
+        self._cooldowns: typing.Dict[
+            typing.Optional[int], typing.Dict[int, typing.List[int]]
+        ] = {}
+        self._cooldowns_changed = False
+        # (time, guild ID or None, user ID) of upcoming cookie reminders
+        self._reminders: typing.List[typing.Tuple[int, int, int]] = []
+        self._scheduled: typing.Dict[typing.Tuple[int, int], int] = {}
+        self._reminders_changed = asyncio.Event()
+        self._tasks: typing.List[asyncio.Task] = []
+        # guild ID (or None in global mode) -> random amount sampler
+        self._samplers: typing.Dict[typing.Optional[int], RewardSampler] = {}
+        # guild ID (or None in global mode) -> user ID -> balance not written to Config yet
+        self._unsaved: typing.Dict[typing.Optional[int], typing.Dict[int, int]] = {}
+        self._journal_path = str(cog_data_path(self) / "journal.jsonl")
+        self._journal = None
+        # entries journaled while the journal file is closed, see `_pause_journal`
+        self._journal_backlog: typing.Optional[typing.List[str]] = None
+        self._compact_lock = asyncio.Lock()
+        self._is_global = False  # loaded by initialize, changed by `[p]cookieset gg`
+        # guild ID (or None in global mode) -> (accounts, seconds) of the last interest run
+        self._interest_runs: typing.Dict[typing.Optional[int], typing.Tuple[int, float]] = {}
+
+    async def initialize(self):
+        self._is_global = await self.config.is_global()
+        now = time.time()
+        for key, accounts in (await self.config.cooldowns()).items():
+            scope = None if key == "global" else int(key)
+            self._cooldowns[scope] = {
+                int(user_id): entry for user_id, entry in accounts.items()
+            }
+            for user_id, entry in self._cooldowns[scope].items():
+                # reminders that came due while offline have been sent already or are late
+                if entry[2] and entry[0] > now:
+                    self._reminders.append((entry[0], scope or 0, user_id))
+                    self._scheduled[(scope or 0, user_id)] = entry[0]
+        heapq.heapify(self._reminders)
+        await self._replay_journal()
+        self._tasks = [
+            asyncio.create_task(self._snapshot_loop()),
+            asyncio.create_task(self._reminder_loop()),
+            asyncio.create_task(self._compact_loop()),
+            asyncio.create_task(self._interest_loop()),
+        ]
+
+    def cog_unload(self):
+        for task in self._tasks:
+            task.cancel()
+        asyncio.create_task(self._save_cooldowns())
+        asyncio.create_task(self._compact(close=True))
+
     async def red_delete_data_for_user(self, *, requester, user_id):
+        for accounts in self._cooldowns.values():
+            if accounts.pop(user_id, None):
+                self._cooldowns_changed = True
+        for index in self._indexes.values():
+            index.remove(user_id)
+        for pool in self._pools.values():
+            pool.discard(user_id)
+        for balances in self._unsaved.values():
+            balances.pop(user_id, None)
+        async with self._compact_lock:
+            await self._pause_journal(self._purge_journal, user_id)
         await self.config.user_from_id(user_id).clear()
-        for guild in self.bot.guilds:
-            await self.config.member_from_ids(guild.id, user_id).clear()
+        members = await self.config.all_members()
+        await asyncio.gather(
+            *(
+                self.config.member_from_ids(guild_id, user_id).clear()
+                for guild_id, guild_members in members.items()
+                if user_id in guild_members
+            )
+        )
+
+    def is_global(self) -> bool:
+        """Whether cookies are global, without reading Config."""
+        return self._is_global
 
     def format_help_for_context(self, ctx: commands.Context) -> str:
         context = super().format_help_for_context(ctx)
@@ -67,37 +647,37 @@ class Cookies(commands.Cog):
         """Get your daily dose of cookies."""
         cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
 
-        if await self.config.is_global():
-            conf = self.config
-            um_conf = self.config.user(ctx.author)
-        else:
-            conf = self.config.guild(ctx.guild)
-            um_conf = self.config.member(ctx.author)
+        conf = (
+            self.config
+            if self.is_global()
+            else self.config.guild(ctx.guild)
+        )
 
         amount = await conf.amount()
-        cookies = await um_conf.cookies()
-        next_cookie = await um_conf.next_cookie()
-        minimum = await conf.minimum()
-        maximum = await conf.maximum()
+        cookies = await self.get_cookies(ctx.author)
+        cooldowns = await self._get_cooldowns(ctx.author)
+        next_cookie = cooldowns[0]
 
         if cur_time >= next_cookie:
             if amount != 0:
-                multipliers = []
-                for role in ctx.author.roles:
-                    role_multiplier = await self.config.role(role).multiplier()
-                    if not role_multiplier:
-                        role_multiplier = 1
-                    multipliers.append(role_multiplier)
-                amount *= max(multipliers)
+                role_table = await self._get_role_table()
+                multipliers = [
+                    role_table[role.id][0] or 1
+                    for role in ctx.author.roles
+                    if role.id in role_table
+                ]
+                amount *= max(multipliers, default=1)
             else:
-                amount = int(random.choice(list(range(minimum, maximum))))
+                amount = (await self._get_sampler(ctx.guild)).sample()
             if self._max_balance_check(cookies + amount):
                 return await ctx.send(
                     "Uh oh, you have reached the maximum amount of cookies that you can put in your bag. :frowning:"
                 )
-            next_cookie = cur_time + await conf.cooldown()
-            await um_conf.next_cookie.set(next_cookie)
-            await self.deposit_cookies(ctx.author, amount)
+            cooldowns[0] = cur_time + await conf.cooldown()
+            self._cooldowns_changed = True
+            if cooldowns[2]:
+                await self._add_reminder(ctx.author, cooldowns[0])
+            await self.deposit_cookies(ctx.author, amount, kind="claim")
             await ctx.send(
                 f"Here {'is' if amount == 1 else 'are'} your {amount} :cookie:"
             )
@@ -105,22 +685,39 @@ class Cookies(commands.Cog):
             dtime = self.display_time(next_cookie - cur_time)
             await ctx.send(f"Uh oh, you have to wait {dtime}.")
 
+    @commands.command()
+    @commands.guild_only()
+    async def cookiereminder(self, ctx: commands.Context, on_off: typing.Optional[bool]):
+        """Get a DM when your next cookie is ready.
+
+        If `on_off` is not provided, the state will be flipped."""
+        cooldowns = await self._get_cooldowns(ctx.author)
+        target_state = on_off if on_off is not None else not cooldowns[2]
+        cooldowns[2] = int(target_state)
+        self._cooldowns_changed = True
+        if not target_state:
+            return await ctx.send("You won't be reminded anymore.")
+        cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
+        if cooldowns[0] > cur_time:
+            await self._add_reminder(ctx.author, cooldowns[0])
+        await ctx.send("I'll send you a DM when your next cookie is ready.")
+
     @commands.command()
     @commands.guild_only()
     async def stealcookies(self, ctx: commands.Context, *, target: typing.Optional[discord.Member]):
         """Steal cookies from members."""
         cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
 
-        if await self.config.is_global():
-            conf = self.config
-            um_conf = self.config.user(ctx.author)
-        else:
-            conf = self.config.guild(ctx.guild)
-            um_conf = self.config.member(ctx.author)
+        conf = (
+            self.config
+            if self.is_global()
+            else self.config.guild(ctx.guild)
+        )
 
-        next_steal = await um_conf.next_steal()
+        cooldowns = await self._get_cooldowns(ctx.author)
+        next_steal = cooldowns[1]
         enabled = await conf.stealing()
-        author_cookies = await um_conf.cookies()
+        author_cookies = await self.get_cookies(ctx.author)
 
         if not enabled:
             return await ctx.send("Uh oh, stealing is disabled.")
@@ -130,35 +727,41 @@ class Cookies(commands.Cog):
 
         if not target:
             # target can only be from the same server
-            ids = await self._get_ids(ctx)
-            while not target:
-                target_id = random.choice(ids)
-                target = ctx.guild.get_member(target_id)
+            pool = await self._get_pool(ctx.guild)
+            if await conf.stealweighted():
+                target_id = pool.weighted_choice(exclude=ctx.author.id)
+            else:
+                target_id = pool.choice(exclude=ctx.author.id)
+            target = ctx.guild.get_member(target_id) if target_id else None
+            if not target:
+                return await ctx.send("Uh oh, there's nobody to steal from.")
         if target.id == ctx.author.id:
             return await ctx.send("Uh oh, you can't steal from yourself.")
-        if await self.config.is_global():
-            target_cookies = await self.config.user(target).cookies()
-        else:
-            target_cookies = await self.config.member(target).cookies()
+        target_cookies = await self.get_cookies(target)
         if target_cookies == 0:
             return await ctx.send(
                 f"Uh oh, {target.display_name} doesn't have any :cookie:"
             )
 
-        await um_conf.next_steal.set(cur_time + await conf.stealcd())
+        cooldowns[1] = cur_time + await conf.stealcd()
+        self._cooldowns_changed = True
 
         if random.randint(1, 100) > 90:
             cookies_stolen = int(target_cookies * 0.5)
             if cookies_stolen == 0:
                 cookies_stolen = 1
             stolen = random.randint(1, cookies_stolen)
-            if self._max_balance_check(author_cookies + stolen):
+            try:
+                await self.transfer(target, ctx.author, stolen, kind="steal")
+            except ValueError:
+                return await ctx.send(
+                    f"Uh oh, {target.display_name} doesn't have any :cookie:"
+                )
+            except errors.BalanceTooHigh:
                 return await ctx.send(
                     "Uh oh, you have reached the maximum amount of cookies that you can put in your jar. :frowning:\n"
                     f"You didn't steal any :cookie: from {target.display_name}."
                 )
-            await self.deposit_cookies(ctx.author, stolen)
-            await self.withdraw_cookies(target, stolen)
             return await ctx.send(
                 f"You stole {stolen} :cookie: from {target.display_name}!"
             )
@@ -174,14 +777,19 @@ class Cookies(commands.Cog):
         penalty = random.randint(1, cookies_penalty)
         if author_cookies < penalty:
             penalty = author_cookies
-        if self._max_balance_check(target_cookies + penalty):
+        try:
+            await self.transfer(ctx.author, target, penalty, kind="steal")
+        except ValueError:
+            return await ctx.send(
+                f"Uh oh, you got caught while trying to steal {target.display_name}'s :cookie:\n"
+                f"You don't have any cookies, so you haven't lost any."
+            )
+        except errors.BalanceTooHigh:
             return await ctx.send(
                 f"Uh oh, you got caught while trying to steal {target.display_name}'s :cookie:\n"
                 f"{target.display_name} has reached the maximum amount of cookies, "
                 "so you haven't lost any."
             )
-        await self.deposit_cookies(target, penalty)
-        await self.withdraw_cookies(ctx.author, penalty)
         await ctx.send(
             f"You got caught while trying to steal {target.display_name}'s :cookie:\nYour penalty is {penalty} :cookie: which they got!"
         )
@@ -190,26 +798,18 @@ class Cookies(commands.Cog):
     @commands.guild_only()
     async def give(self, ctx: commands.Context, target: discord.Member, amount: int):
         """Give someone some yummy cookies."""
-        um_conf = (
-            self.config.user(ctx.author)
-            if await self.config.is_global()
-            else self.config.member(ctx.author)
-        )
-
-        author_cookies = await um_conf.cookies()
         if amount <= 0:
             return await ctx.send("Uh oh, amount has to be more than 0.")
         if target.id == ctx.author.id:
             return await ctx.send("Why would you do that?")
-        if amount > author_cookies:
+        try:
+            await self.transfer(ctx.author, target, amount, kind="give")
+        except ValueError:
             return await ctx.send("You don't have enough cookies yourself!")
-        target_cookies = await self.config.member(target).cookies()
-        if self._max_balance_check(target_cookies + amount):
+        except errors.BalanceTooHigh:
             return await ctx.send(
                 f"Uh oh, {target.display_name}'s jar would be way too full."
             )
-        await self.withdraw_cookies(ctx.author, amount)
-        await self.deposit_cookies(target, amount)
         await ctx.send(
             f"{ctx.author.mention} has gifted {amount} :cookie: to {target.mention}"
         )
@@ -221,20 +821,10 @@ class Cookies(commands.Cog):
     ):
         """Check how many cookies you have."""
         if not target:
-            um_conf = (
-                self.config.user(ctx.author)
-                if await self.config.is_global()
-                else self.config.member(ctx.author)
-            )
-            cookies = await um_conf.cookies()
+            cookies = await self.get_cookies(ctx.author)
             await ctx.send(f"You have {cookies} :cookie:")
         else:
-            um_conf = (
-                self.config.user(target)
-                if await self.config.is_global()
-                else self.config.member(target)
-            )
-            cookies = await um_conf.cookies()
+            cookies = await self.get_cookies(target)
             await ctx.send(f"{target.display_name} has {cookies} :cookie:")
 
     @commands.command()
@@ -251,7 +841,7 @@ class Cookies(commands.Cog):
 
         conf = (
             self.config
-            if await self.config.is_global()
+            if self.is_global()
             else self.config.guild(ctx.guild)
         )
 
@@ -266,7 +856,7 @@ class Cookies(commands.Cog):
             new_cookies = int(amount * rate)
             if self._max_balance_check(new_cookies):
                 return await ctx.send(f"Uh oh, your jar would be way too full.")
-            await self.deposit_cookies(ctx.author, new_cookies)
+            await self.deposit_cookies(ctx.author, new_cookies, kind="exchange")
             return await ctx.send(
                 f"You have exchanged {amount} {currency} and got {new_cookies} :cookie:"
             )
@@ -275,19 +865,28 @@ class Cookies(commands.Cog):
             await bank.deposit_credits(ctx.author, new_currency)
         except errors.BalanceTooHigh:
             return await ctx.send(f"Uh oh, your bank balance would be way too high.")
-        await self.withdraw_cookies(ctx.author, amount)
+        await self.withdraw_cookies(ctx.author, amount, kind="exchange")
         return await ctx.send(
             f"You have exchanged {amount} :cookie: and got {new_currency} {currency}"
         )
 
     @commands.command()
     @commands.guild_only()
-    async def leaderboard(self, ctx: commands.Context):
-        """Display the server's cookie leaderboard."""
-        ids = await self._get_ids(ctx)
-        lst = []
-        pos = 1
-        pound_len = len(str(len(ids)))
+    async def leaderboard(self, ctx: commands.Context, this_server: bool = False):
+        """Display the cookie leaderboard.
+
+        With global cookies, set `this_server` to true to only see this server's members."""
+        index = await self._get_index(ctx.guild)
+        is_global = self.is_global()
+        if is_global and this_server:
+            # the ranking is filtered page by page, only the size is counted up front
+            size = sum(1 for m in ctx.guild.members if index.get(m.id) > 0)
+        else:
+            size = len(index)
+        if not size:
+            empty = "Nothing to see here."
+            return await ctx.send(box(empty, lang="md"))
+        pound_len = len(str(size))
         header = "{pound:{pound_len}}{score:{bar_len}}{name:2}\n".format(
             pound="#",
             name="Name",
@@ -295,45 +894,78 @@ class Cookies(commands.Cog):
             pound_len=pound_len + 3,
             bar_len=pound_len + 9,
         )
-        temp_msg = header
-        is_global = await self.config.is_global()
-        for a_id in ids:
-            a = self.bot.get_user(a_id) if is_global else ctx.guild.get_member(a_id)
-            if not a:
-                continue
-            name = a.display_name
-            cookies = (
-                await self.config.user(a).cookies()
-                if is_global
-                else await self.config.member(a).cookies()
-            )
-            if cookies == 0:
-                continue
-            score = "Cookies"
-            if a_id != ctx.author.id:
-                temp_msg += (
-                    f"{f'{pos}.': <{pound_len+2}} {cookies: <{pound_len+8}} {name}\n"
+        # ranking position each page starts at, for filtered leaderboards
+        cursors = [0]
+
+        async def get_page(page: int) -> str:
+            start = page * _PAGE_SIZE
+            if is_global and this_server:
+                while len(cursors) <= page:
+                    _, cursor = index.filtered_page(
+                        cursors[-1], _PAGE_SIZE, ctx.guild.get_member
+                    )
+                    cursors.append(cursor)
+                entries, _ = index.filtered_page(
+                    cursors[page], _PAGE_SIZE, ctx.guild.get_member
                 )
             else:
-                temp_msg += (
-                    f"{f'{pos}.': <{pound_len+2}} "
-                    f"{cookies: <{pound_len+8}} "
-                    f"<<{name}>>\n"
-                )
-            if pos % 10 == 0:
-                lst.append(box(temp_msg, lang="md"))
-                temp_msg = header
-            pos += 1
-        if temp_msg != header:
-            lst.append(box(temp_msg, lang="md"))
-        if lst:
-            if len(lst) > 1:
-                await menu(ctx, lst, DEFAULT_CONTROLS)
-            else:
-                await ctx.send(lst[0])
-        else:
-            empty = "Nothing to see here."
-            await ctx.send(box(empty, lang="md"))
+                entries = index.page(start, start + _PAGE_SIZE)
+            temp_msg = header
+            for pos, (a_id, cookies) in enumerate(entries, start + 1):
+                a = self.bot.get_user(a_id) if is_global else ctx.guild.get_member(a_id)
+                name = a.display_name if a else str(a_id)
+                if a_id != ctx.author.id:
+                    temp_msg += (
+                        f"{f'{pos}.': <{pound_len+2}} {cookies: <{pound_len+8}} {name}\n"
+                    )
+                else:
+                    temp_msg += (
+                        f"{f'{pos}.': <{pound_len+2}} "
+                        f"{cookies: <{pound_len+8}} "
+                        f"<<{name}>>\n"
+                    )
+            return box(temp_msg, lang="md")
+
+        page_count = -(-size // _PAGE_SIZE)
+        await _lazy_menu(ctx, page_count, get_page)
+
+    @commands.command()
+    @commands.guild_only()
+    async def cookierank(
+        self, ctx: commands.Context, *, target: typing.Optional[discord.Member]
+    ):
+        """Check your (or someone else's) position on the leaderboard."""
+        target = target or ctx.author
+        index = await self._get_index(ctx.guild)
+        rank = index.rank(target.id)
+        if not rank:
+            return await ctx.send(
+                f"{target.display_name} isn't on the leaderboard, they don't have any :cookie:"
+            )
+        await ctx.send(
+            f"{target.display_name} is #{rank} out of {len(index)} "
+            f"with {index.get(target.id)} :cookie:"
+        )
+
+    @commands.command()
+    @checks.is_owner()
+    async def cookiehistory(self, ctx: commands.Context, user_id: int, limit: int = 20):
+        """See the latest cookie transactions of a user."""
+        if limit <= 0:
+            return await ctx.send("Uh oh, limit has to be more than 0.")
+        paths = [self._journal_path] + self._journal_segments()[::-1]
+        entries = await self.bot.loop.run_in_executor(
+            None, _read_history, paths, user_id, limit
+        )
+        if not entries:
+            return await ctx.send("Uh oh, there's no history for that user.")
+        msg = ""
+        for entry in entries:
+            when = datetime.datetime.utcfromtimestamp(entry["t"]).strftime("%Y-%m-%d %H:%M")
+            where = entry["s"] or "global"
+            msg += f"{when} {where} {entry['k']}: {entry['d']:+} ({entry['b']})\n"
+        for page in pagify(msg):
+            await ctx.send(box(page))
 
     @commands.group(autohelp=True)
     @commands.admin_or_permissions(manage_guild=True)
@@ -349,25 +981,36 @@ class Cookies(commands.Cog):
         confirmation: typing.Optional[bool],
     ):
         """Switch from per-guild to global cookies and vice versa."""
-        if await self.config.is_global() == make_global:
+        if self.is_global() == make_global:
             return await ctx.send("Uh oh, you're not really changing anything.")
         if not confirmation:
             return await ctx.send(
                 "This will delete **all** current settings. This action **cannot** be undone.\n"
+                f"To keep the balances, use `{ctx.clean_prefix}cookieset export` first "
+                f"and `{ctx.clean_prefix}cookieset import no yes` afterwards.\n"
                 f"If you're sure, type `{ctx.clean_prefix}cookieset gg <make_global> yes`."
             )
+        await self._compact()
         await self.config.clear_all_members()
         await self.config.clear_all_users()
         await self.config.clear_all_guilds()
         await self.config.clear_all_globals()
         await self.config.is_global.set(make_global)
+        self._is_global = make_global
+        self._indexes.clear()
+        self._unsaved.clear()
+        self._pools.clear()
+        self._samplers.clear()
+        self._cooldowns.clear()
+        self._cooldowns_changed = True
         await ctx.send(f"Cookies are now {'global' if make_global else 'per-guild'}.")
 
-    @cookieset.command(name="amount")
+    @cookieset.group(name="amount", invoke_without_command=True)
     async def cookieset_amount(self, ctx: commands.Context, amount: int):
         """Set the amount of cookies members can obtain.
 
-        If 0, members will get a random amount."""
+        If 0, members will get a random amount.
+        Use the subcommands to choose how the random amount is distributed."""
         if amount < 0:
             return await ctx.send("Uh oh, the amount cannot be negative.")
         if self._max_balance_check(amount):
@@ -376,7 +1019,7 @@ class Cookies(commands.Cog):
             )
         conf = (
             self.config
-            if await self.config.is_global()
+            if self.is_global()
             else self.config.guild(ctx.guild)
         )
         await conf.amount.set(amount)
@@ -399,11 +1042,71 @@ class Cookies(commands.Cog):
             return await ctx.send("You took too long. Try again, please.")
         maximum = pred.result
         await conf.maximum.set(maximum)
+        await conf.distribution.set("uniform")
+        await self._reset_sampler(ctx.guild)
 
         await ctx.send(
             f"Members will receive a random amount of cookies between {minimum} and {maximum}."
         )
 
+    @cookieset_amount.command(name="uniform")
+    async def cookieset_amount_uniform(
+        self, ctx: commands.Context, minimum: int, maximum: int
+    ):
+        """Give a random amount, every amount between minimum and maximum is equally likely."""
+        if minimum < 0 or maximum < minimum or self._max_balance_check(maximum):
+            return await ctx.send(
+                "Uh oh, the amounts have to be between 0 and the maximum balance, "
+                "and the minimum can't be greater than the maximum."
+            )
+        await self._set_distribution(ctx, "uniform", minimum=minimum, maximum=maximum)
+
+    @cookieset_amount.command(name="geometric")
+    async def cookieset_amount_geometric(
+        self, ctx: commands.Context, minimum: int, maximum: int, chance: float
+    ):
+        """Give a random amount, small amounts are common and big ones rare.
+
+        Starting at minimum, every extra cookie is given with the `chance` (in %)
+        that the previous one was given, up to maximum."""
+        if minimum < 0 or maximum < minimum or self._max_balance_check(maximum):
+            return await ctx.send(
+                "Uh oh, the amounts have to be between 0 and the maximum balance, "
+                "and the minimum can't be greater than the maximum."
+            )
+        if not 0 < chance < 100:
+            return await ctx.send("Uh oh, the chance has to be between 0 and 100.")
+        await self._set_distribution(
+            ctx, "geometric", minimum=minimum, maximum=maximum, ratio=1 - chance / 100
+        )
+
+    @cookieset_amount.command(name="weighted")
+    async def cookieset_amount_weighted(self, ctx: commands.Context, *buckets: str):
+        """Give a random amount from weighted buckets.
+
+        Buckets are written as `low-high:weight`, for example
+        `[p]cookieset amount weighted 1-10:80 11-100:19 1000-1000:1`"""
+        parsed = []
+        for bucket in buckets:
+            try:
+                amounts, weight = bucket.split(":")
+                low, high = amounts.split("-")
+                low, high, weight = int(low), int(high), int(weight)
+            except ValueError:
+                return await ctx.send(f"Uh oh, `{bucket}` isn't a valid bucket.")
+            if low < 0 or high < low or weight <= 0 or self._max_balance_check(high):
+                return await ctx.send(f"Uh oh, `{bucket}` isn't a valid bucket.")
+            parsed.append([low, high, weight])
+        if not parsed:
+            return await ctx.send_help()
+        await self._set_distribution(
+            ctx,
+            "weighted",
+            minimum=min(low for low, _, _ in parsed),
+            maximum=max(high for _, high, _ in parsed),
+            buckets=parsed,
+        )
+
     @cookieset.command(name="cooldown", aliases=["cd"])
     async def cookieset_cd(self, ctx: commands.Context, seconds: int):
         """Set the cooldown for `[p]cookie`.
@@ -413,7 +1116,7 @@ class Cookies(commands.Cog):
             return await ctx.send("Uh oh, cooldown has to be more than 0 seconds.")
         conf = (
             self.config
-            if await self.config.is_global()
+            if self.is_global()
             else self.config.guild(ctx.guild)
         )
         await conf.cooldown.set(seconds)
@@ -428,7 +1131,7 @@ class Cookies(commands.Cog):
             return await ctx.send("Uh oh, cooldown has to be more than 0 seconds.")
         conf = (
             self.config
-            if await self.config.is_global()
+            if self.is_global()
             else self.config.guild(ctx.guild)
         )
         await conf.stealcd.set(seconds)
@@ -443,7 +1146,7 @@ class Cookies(commands.Cog):
         If `on_off` is not provided, the state will be flipped."""
         conf = (
             self.config
-            if await self.config.is_global()
+            if self.is_global()
             else self.config.guild(ctx.guild)
         )
         target_state = on_off or not (await conf.stealing())
@@ -453,6 +1156,26 @@ class Cookies(commands.Cog):
         else:
             await ctx.send("Stealing is now disabled.")
 
+    @cookieset.command(name="stealweight")
+    async def cookieset_stealweight(
+        self, ctx: commands.Context, on_off: typing.Optional[bool]
+    ):
+        """Toggle whether richer members are more likely to be stolen from.
+
+        Only applies when `[p]steal` is used without a target.
+        If `on_off` is not provided, the state will be flipped."""
+        conf = (
+            self.config
+            if self.is_global()
+            else self.config.guild(ctx.guild)
+        )
+        target_state = on_off or not (await conf.stealweighted())
+        await conf.stealweighted.set(target_state)
+        if target_state:
+            await ctx.send("Random targets are now chosen by how many cookies they have.")
+        else:
+            await ctx.send("Random targets are now chosen equally.")
+
     @cookieset.command(name="set")
     async def cookieset_set(
         self, ctx: commands.Context, target: discord.Member, amount: int
@@ -464,12 +1187,7 @@ class Cookies(commands.Cog):
             return await ctx.send(
                 f"Uh oh, amount can't be greater than {_MAX_BALANCE:,}."
             )
-        um_conf = (
-            self.config.user(target)
-            if await self.config.is_global()
-            else self.config.member(target)
-        )
-        await um_conf.cookies.set(amount)
+        await self._set_cookies(target, amount)
         await ctx.send(f"Set {target.mention}'s balance to {amount} :cookie:")
 
     @cookieset.command(name="add")
@@ -479,12 +1197,7 @@ class Cookies(commands.Cog):
         """Add cookies to someone."""
         if amount <= 0:
             return await ctx.send("Uh oh, amount has to be more than 0.")
-        um_conf = (
-            self.config.user(target)
-            if await self.config.is_global()
-            else self.config.member(target)
-        )
-        target_cookies = await um_conf.cookies()
+        target_cookies = await self.get_cookies(target)
         if self._max_balance_check(target_cookies + amount):
             return await ctx.send(
                 f"Uh oh, {target.display_name} has reached the maximum amount of cookies."
@@ -499,12 +1212,7 @@ class Cookies(commands.Cog):
         """Take cookies away from someone."""
         if amount <= 0:
             return await ctx.send("Uh oh, amount has to be more than 0.")
-        um_conf = (
-            self.config.user(target)
-            if await self.config.is_global()
-            else self.config.member(target)
-        )
-        target_cookies = await um_conf.cookies()
+        target_cookies = await self.get_cookies(target)
         if amount <= target_cookies:
             await self.withdraw_cookies(target, amount)
             return await ctx.send(
@@ -512,6 +1220,27 @@ class Cookies(commands.Cog):
             )
         await ctx.send(f"{target.mention} doesn't have enough :cookies:")
 
+    @cookieset.group(name="bulk", autohelp=True)
+    async def cookieset_bulk(self, ctx: commands.Context):
+        """Change the cookies of many members at once.
+
+        Targets can be roles, member mentions or IDs, or `everyone`."""
+
+    @cookieset_bulk.command(name="add")
+    async def cookieset_bulk_add(self, ctx: commands.Context, amount: int, *targets: str):
+        """Add cookies to many members."""
+        await self._bulk_command(ctx, "add", amount, targets)
+
+    @cookieset_bulk.command(name="take")
+    async def cookieset_bulk_take(self, ctx: commands.Context, amount: int, *targets: str):
+        """Take cookies away from many members."""
+        await self._bulk_command(ctx, "take", amount, targets)
+
+    @cookieset_bulk.command(name="set")
+    async def cookieset_bulk_set(self, ctx: commands.Context, amount: int, *targets: str):
+        """Set the amount of cookies of many members."""
+        await self._bulk_command(ctx, "set", amount, targets)
+
     @cookieset.command(name="reset")
     async def cookieset_reset(
         self, ctx: commands.Context, confirmation: typing.Optional[bool]
@@ -522,12 +1251,100 @@ class Cookies(commands.Cog):
                 "This will delete **all** cookies from all members. This action **cannot** be undone.\n"
                 f"If you're sure, type `{ctx.clean_prefix}cookieset reset yes`."
             )
-        if await self.config.is_global():
+        await self._compact()
+        if self.is_global():
             await self.config.clear_all_users()
+            self._indexes.pop(None, None)
+            self._unsaved.pop(None, None)
+            self._pools.clear()
+            self._cooldowns.pop(None, None)
         else:
             await self.config.clear_all_members(ctx.guild)
+            self._indexes.pop(ctx.guild.id, None)
+            self._unsaved.pop(ctx.guild.id, None)
+            self._pools.pop(ctx.guild.id, None)
+            self._cooldowns.pop(ctx.guild.id, None)
+        self._cooldowns_changed = True
         await ctx.send("All cookies have been deleted from all members.")
 
+    @cookieset.command(name="export")
+    async def cookieset_export(self, ctx: commands.Context, file_format: str = "csv"):
+        """Export all balances to a file.
+
+        The format can be `csv` or `jsonl`."""
+        file_format = file_format.lower()
+        if file_format not in ("csv", "jsonl"):
+            return await ctx.send("Uh oh, the format has to be `csv` or `jsonl`.")
+        is_global = self.is_global()
+        scope = None if is_global else ctx.guild.id
+        index = await self._get_index(ctx.guild)
+        filename = f"cookies-{scope or 'global'}.{file_format}.gz"
+        path = str(cog_data_path(self) / f"{ctx.message.id}-{filename}")
+        # the index can change while the file is written, the executor gets a copy
+        balances = index.balances.copy()
+        try:
+            async with ctx.typing():
+                written = await self.bot.loop.run_in_executor(
+                    None, _write_export, path, scope, balances
+                )
+                await ctx.send(
+                    f"Exported {written} balances.",
+                    file=discord.File(path, filename=filename),
+                )
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    @cookieset.command(name="import")
+    async def cookieset_import(
+        self,
+        ctx: commands.Context,
+        add: typing.Optional[bool] = False,
+        convert: typing.Optional[bool] = False,
+    ):
+        """Import balances from a file made by `[p]cookieset export`.
+
+        Attach the file to the message.
+        If `add` is true, the balances are added instead of replacing the current ones.
+        If `convert` is true, per-guild balances are imported into global ones and vice versa;
+        a user's balances from several guilds are summed."""
+        if not ctx.message.attachments:
+            return await ctx.send("Uh oh, you have to attach the file.")
+        attachment = ctx.message.attachments[0]
+        if not attachment.filename.lower().endswith(_EXPORT_FORMATS):
+            return await ctx.send("Uh oh, the file has to be a `.csv` or `.jsonl` file.")
+        is_global = self.is_global()
+        scope = None if is_global else ctx.guild.id
+        path = str(cog_data_path(self) / f"{ctx.message.id}-{attachment.filename.lower()}")
+        try:
+            async with ctx.typing():
+                await attachment.save(path)
+                balances, skipped = await self.bot.loop.run_in_executor(
+                    None, _load_import, path, scope, convert
+                )
+        except (ValueError, UnicodeDecodeError, OSError, EOFError, csv.Error) as e:
+            return await ctx.send(f"Uh oh, the file couldn't be imported: {e}")
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+        index = await self._get_index(ctx.guild)
+        too_high = 0
+        async with self._lock_all_accounts(), self._compact_lock:
+            if add:
+                for user_id, balance in list(balances.items()):
+                    balances[user_id] = balance = balance + index.get(user_id)
+                    if self._max_balance_check(balance):
+                        del balances[user_id]
+                        too_high += 1
+            await self._write_many(scope, balances, "import")
+        msg = f"Imported {len(balances)} balances."
+        if skipped:
+            msg += f"\n{skipped} skipped, they're from another scope."
+        if too_high:
+            msg += f"\n{too_high} skipped, their jar would be way too full."
+        await ctx.send(msg)
+
     @cookieset.command(name="rate")
     async def cookieset_rate(
         self, ctx: commands.Context, rate: typing.Union[int, float]
@@ -537,7 +1354,7 @@ class Cookies(commands.Cog):
             return await ctx.send("Uh oh, rate has to be more than 0.")
         conf = (
             self.config
-            if await self.config.is_global()
+            if self.is_global()
             else self.config.guild(ctx.guild)
         )
         await conf.rate.set(rate)
@@ -547,10 +1364,66 @@ class Cookies(commands.Cog):
             f"Set the exchange rate {rate}. This means that 100 {currency} will give you {test_amount} :cookie:"
         )
 
+    @cookieset.group(name="interest", autohelp=True)
+    async def cookieset_interest(self, ctx: commands.Context):
+        """Let cookies grow (or decay) over time."""
+
+    @cookieset_interest.command(name="rate")
+    async def cookieset_interest_rate(self, ctx: commands.Context, percent: float):
+        """Set the interest in % of the balance.
+
+        Use a negative rate to make cookies decay, 0 disables interest."""
+        if percent <= -100:
+            return await ctx.send("Uh oh, cookies can't decay by 100% or more.")
+        conf = (
+            self.config
+            if self.is_global()
+            else self.config.guild(ctx.guild)
+        )
+        await conf.interest.set(percent)
+        if not percent:
+            return await ctx.send("Interest is now disabled.")
+        await conf.nextinterest.set(int(time.time()) + await conf.interestcd())
+        await ctx.send(f"Balances will now change by {percent}% every cooldown.")
+
+    @cookieset_interest.command(name="cooldown", aliases=["cd"])
+    async def cookieset_interest_cd(self, ctx: commands.Context, seconds: int):
+        """Set how often interest is paid.
+
+        This is in seconds! Default is 86400 seconds (24 hours)."""
+        if seconds < _INTEREST_CHECK:
+            return await ctx.send(
+                f"Uh oh, cooldown has to be at least {_INTEREST_CHECK} seconds."
+            )
+        conf = (
+            self.config
+            if self.is_global()
+            else self.config.guild(ctx.guild)
+        )
+        await conf.interestcd.set(seconds)
+        await conf.nextinterest.set(int(time.time()) + seconds)
+        await ctx.send(f"Set the cooldown to {seconds} seconds.")
+
+    @cookieset_interest.command(name="run")
+    async def cookieset_interest_run(self, ctx: commands.Context):
+        """Pay interest right now."""
+        is_global = self.is_global()
+        conf = self.config if is_global else self.config.guild(ctx.guild)
+        percent = await conf.interest()
+        if not percent:
+            return await ctx.send("Uh oh, interest is disabled.")
+        async with ctx.typing():
+            accounts, seconds = await self.apply_interest(
+                None if is_global else ctx.guild, percent
+            )
+        await ctx.send(
+            f"Paid {percent}% interest to {accounts} accounts in {seconds:.2f} seconds."
+        )
+
     @cookieset.command(name="settings")
     async def cookieset_settings(self, ctx: commands.Context):
         """See current settings."""
-        is_global = await self.config.is_global()
+        is_global = self.is_global()
         data = (
             await self.config.all()
             if is_global
@@ -561,7 +1434,7 @@ class Cookies(commands.Cog):
         amount = (
             str(amount)
             if amount != 0
-            else f"random amount between {data['minimum']} and {data['maximum']}"
+            else (await self._get_sampler(ctx.guild)).describe()
         )
 
         stealing = data["stealing"]
@@ -582,6 +1455,15 @@ class Cookies(commands.Cog):
         embed.add_field(name="\u200b", value="\u200b")
         embed.add_field(name="Stealing:", value=stealing)
         embed.add_field(name="Cooldown:", value=self.display_time(data["stealcd"]))
+        embed.add_field(name="\u200b", value="\u200b")
+        embed.add_field(name="Interest:", value=f"{data['interest']}%")
+        embed.add_field(name="Cooldown:", value=self.display_time(data["interestcd"]))
+        last_run = self._interest_runs.get(None if is_global else ctx.guild.id)
+        if last_run:
+            embed.add_field(
+                name="Last interest run:",
+                value=f"{last_run[0]} accounts in {last_run[1]:.2f} seconds",
+            )
 
         await ctx.send(embed=embed)
 
@@ -598,18 +1480,20 @@ class Cookies(commands.Cog):
         if amount <= 0:
             return await ctx.send("Uh oh, amount has to be more than 0.")
         await self.config.role(role).cookies.set(amount)
+        await self._update_role_table(role, cookies=amount)
         await ctx.send(f"Gaining {role.name} will now give {amount} :cookie:")
 
     @role.command(name="del")
     async def cookieset_role_del(self, ctx: commands.Context, role: discord.Role):
         """Delete cookies for role."""
         await self.config.role(role).cookies.set(0)
+        await self._update_role_table(role, cookies=0)
         await ctx.send(f"Gaining {role.name} will now not give any :cookie:")
 
     @role.command(name="show")
     async def cookieset_role_show(self, ctx: commands.Context, role: discord.Role):
         """Show how many cookies a role gives."""
-        cookies = int(await self.config.role(role).cookies())
+        cookies = (await self._get_role_table()).get(role.id, (1, 0))[1]
         await ctx.send(f"Gaining {role.name} gives {cookies} :cookie:")
 
     @role.command(name="multiplier")
@@ -622,30 +1506,262 @@ class Cookies(commands.Cog):
         if multiplier <= 0:
             return await ctx.send("Uh oh, multiplier has to be more than 0.")
         await self.config.role(role).multiplier.set(multiplier)
+        await self._update_role_table(role, multiplier=multiplier)
         await ctx.send(
             f"Users with {role.name} will now get {multiplier} times more :cookie:"
         )
 
     @commands.Cog.listener()
     async def on_member_update(self, before, after):
+        if before.roles == after.roles:
+            return
+        role_table = await self._get_role_table()
         b = set(before.roles)
-        a = set(after.roles)
-        after_roles = [list(a - b)][0]
-        if after_roles:
-            for role in after_roles:
-                cookies = await self.config.role(role).cookies()
-                if cookies != 0:
-                    old_cookies = await self.config.member(after).cookies()
-                    if self._max_balance_check(old_cookies + cookies):
-                        continue
-                    await self.deposit_cookies(after, cookies)
-
-    async def _get_ids(self, ctx):
-        if await self.config.is_global():
+        cookies = sum(
+            role_table[role.id][1]
+            for role in after.roles
+            if role not in b and role.id in role_table
+        )
+        if cookies != 0:
+            old_cookies = await self.get_cookies(after)
+            if self._max_balance_check(old_cookies + cookies):
+                return
+            await self.deposit_cookies(after, cookies, kind="role")
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        index = self._indexes.get(member.guild.id)
+        if index is not None:
+            index.show(member.id)
+        pool = self._pools.get(member.guild.id)
+        if pool is not None:
+            key = None if self.is_global() else member.guild.id
+            index = self._indexes.get(key)
+            pool.update(member.id, index.get(member.id) if index is not None else 0)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        index = self._indexes.get(member.guild.id)
+        if index is not None:
+            index.hide(member.id)
+        pool = self._pools.get(member.guild.id)
+        if pool is not None:
+            pool.discard(member.id)
+
+    async def _bulk_command(
+        self, ctx: commands.Context, operation: str, amount: int, targets: typing.Tuple[str]
+    ):
+        if amount <= 0:
+            return await ctx.send("Uh oh, amount has to be more than 0.")
+        if self._max_balance_check(amount):
+            return await ctx.send(f"Uh oh, amount can't be greater than {_MAX_BALANCE:,}.")
+        if not targets:
+            return await ctx.send_help()
+        user_ids = set()
+        for target in targets:
+            if target.lower() == "everyone":
+                user_ids = None
+                break
+            try:
+                role = await commands.RoleConverter().convert(ctx, target)
+            except commands.BadArgument:
+                pass
+            else:
+                user_ids.update(member.id for member in role.members)
+                continue
+            try:
+                user_ids.add(int(target.strip("<@!>")))
+            except ValueError:
+                return await ctx.send(f"Uh oh, `{target}` isn't a role, member or ID.")
+        async with ctx.typing():
+            updated, too_high, too_low = await self.bulk_update(
+                ctx.guild, user_ids, operation, amount
+            )
+        msg = f"Updated the balance of {updated} {'member' if updated == 1 else 'members'}."
+        if too_high:
+            msg += f"\n{too_high} skipped, their jar would be way too full."
+        if too_low:
+            msg += f"\n{too_low} skipped, they don't have enough :cookie:"
+        await ctx.send(msg)
+
+    async def _get_sampler(self, guild: discord.Guild) -> RewardSampler:
+        is_global = self.is_global()
+        key = None if is_global else guild.id
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            conf = self.config if is_global else self.config.guild(guild)
+            data = await conf.all()
+            sampler = self._samplers[key] = RewardSampler(
+                data["distribution"],
+                data["minimum"],
+                data["maximum"],
+                data["ratio"],
+                data["buckets"],
+            )
+        return sampler
+
+    async def _reset_sampler(self, guild: discord.Guild):
+        self._samplers.pop(None if self.is_global() else guild.id, None)
+
+    async def _set_distribution(self, ctx: commands.Context, distribution: str, **values):
+        conf = (
+            self.config
+            if self.is_global()
+            else self.config.guild(ctx.guild)
+        )
+        await conf.amount.set(0)
+        await conf.distribution.set(distribution)
+        for key, value in values.items():
+            await conf.get_attr(key).set(value)
+        await self._reset_sampler(ctx.guild)
+        sampler = await self._get_sampler(ctx.guild)
+        await ctx.send(f"Members will receive a {sampler.describe()}.")
+
+    async def _get_role_table(self) -> typing.Dict[int, typing.Tuple[int, int]]:
+        if self._role_table is None:
+            data = await self.config.all_roles()
+            table = {
+                role_id: (role["multiplier"], role["cookies"])
+                for role_id, role in data.items()
+            }
+            if self._role_table is None:
+                self._role_table = table
+        return self._role_table
+
+    async def _update_role_table(self, role: discord.Role, **values):
+        role_table = await self._get_role_table()
+        multiplier, cookies = role_table.get(role.id, (1, 0))
+        multiplier = values.get("multiplier", multiplier)
+        cookies = values.get("cookies", cookies)
+        if (multiplier, cookies) == (1, 0):
+            role_table.pop(role.id, None)
+        else:
+            role_table[role.id] = (multiplier, cookies)
+
+    async def _get_index(self, guild: discord.Guild) -> BalanceIndex:
+        if self.is_global():
+            return await self._load_index(None)
+        return await self._load_index(guild.id, guild)
+
+    async def _get_account_index(self, user, is_global: bool) -> BalanceIndex:
+        if is_global:
+            return await self._load_index(None)
+        return await self._load_index(user.guild.id, user.guild)
+
+    async def _load_index(
+        self, key: typing.Optional[int], guild: typing.Optional[discord.Guild] = None
+    ) -> BalanceIndex:
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+        if key is None:
             data = await self.config.all_users()
+            hidden = ()
+        else:
+            data = await self.config.all_members(guild)
+            hidden = [m_id for m_id in data if not guild.get_member(m_id)]
+        balances = {a_id: account["cookies"] for a_id, account in data.items()}
+        if key not in self._indexes:
+            self._seed_cooldowns(key, data)
+        # another task may have loaded the index while we were waiting
+        return self._indexes.setdefault(key, BalanceIndex(balances, hidden))
+
+    def _seed_cooldowns(self, key: typing.Optional[int], data: dict):
+        """Merge cooldowns stored per account (before 1.3.0) into the snapshot."""
+        accounts = self._cooldowns.setdefault(key, {})
+        for a_id, account in data.items():
+            if account["next_cookie"] or account["next_steal"]:
+                entry = accounts.setdefault(a_id, [0, 0, 0])
+                entry[0] = max(entry[0], account["next_cookie"])
+                entry[1] = max(entry[1], account["next_steal"])
+
+    async def _get_cooldowns(self, user) -> typing.List[int]:
+        """[next_cookie, next_steal, remind] of an account, changes have to be flagged."""
+        guild = user.guild
+        key = None if self.is_global() else guild.id
+        await self._get_index(guild)
+        return self._cooldowns.setdefault(key, {}).setdefault(user.id, [0, 0, 0])
+
+    async def _add_reminder(self, user, when: int):
+        scope = 0 if self.is_global() else user.guild.id
+        if self._scheduled.get((scope, user.id)) == when:
+            return
+        self._scheduled[(scope, user.id)] = when
+        heapq.heappush(self._reminders, (when, scope, user.id))
+        self._reminders_changed.set()
+
+    async def _save_cooldowns(self):
+        if not self._cooldowns_changed:
+            return
+        self._cooldowns_changed = False
+        now = time.time()
+        snapshot = {}
+        for scope, accounts in self._cooldowns.items():
+            # expired cooldowns don't need to be remembered
+            entries = {
+                str(user_id): entry
+                for user_id, entry in accounts.items()
+                if entry[2] or entry[0] > now or entry[1] > now
+            }
+            if entries:
+                snapshot["global" if scope is None else str(scope)] = entries
+        await self.config.cooldowns.set(snapshot)
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(_SNAPSHOT_INTERVAL)
+            await self._save_cooldowns()
+
+    async def _reminder_loop(self):
+        await self.bot.wait_until_red_ready()
+        while True:
+            self._reminders_changed.clear()
+            now = time.time()
+            due = []
+            while self._reminders and self._reminders[0][0] <= now:
+                due.append(heapq.heappop(self._reminders))
+            for i in range(0, len(due), _REMINDER_BATCH):
+                await asyncio.gather(
+                    *(self._send_reminder(*reminder) for reminder in due[i : i + _REMINDER_BATCH])
+                )
+            delay = _REMINDER_MAX_SLEEP
+            if self._reminders:
+                delay = min(delay, max(self._reminders[0][0] - time.time(), 0))
+            try:
+                await asyncio.wait_for(self._reminders_changed.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send_reminder(self, when: int, scope: int, user_id: int):
+        if self._scheduled.get((scope, user_id)) == when:
+            del self._scheduled[(scope, user_id)]
+        entry = self._cooldowns.get(scope or None, {}).get(user_id)
+        if not entry or not entry[2] or entry[0] != when:
+            return  # turned off, or the cookie was claimed again in the meantime
+        user = self.bot.get_user(user_id)
+        if not user:
+            return
+        guild = self.bot.get_guild(scope) if scope else None
+        where = f" in {guild.name}" if guild else ""
+        try:
+            await user.send(f"Your next :cookie: is ready{where}!")
+        except (discord.Forbidden, discord.HTTPException):
+            pass
+
+    async def _get_pool(self, guild: discord.Guild) -> VictimPool:
+        pool = self._pools.get(guild.id)
+        if pool is not None:
+            return pool
+        balances = (await self._get_index(guild)).balances
+        if len(guild.members) < len(balances):
+            eligible = {m.id: balances.get(m.id, 0) for m in guild.members}
         else:
-            data = await self.config.all_members(ctx.guild)
-        return sorted(data, key=lambda x: data[x]["cookies"], reverse=True)
+            eligible = {
+                m_id: balance
+                for m_id, balance in balances.items()
+                if guild.get_member(m_id)
+            }
+        return self._pools.setdefault(guild.id, VictimPool(eligible))
 
     @staticmethod
     def display_time(seconds, granularity=2):
@@ -674,35 +1790,368 @@ class Cookies(commands.Cog):
             return True
 
     async def can_spend(self, user, amount):
-        if await self.config.is_global():
-            return await self.config.user(user).cookies() >= amount
-        return await self.config.member(user).cookies() >= amount
+        return await self.get_cookies(user) >= amount
 
     async def _can_spend(self, to_currency, user, amount):
         if to_currency:
             return bool(await self.can_spend(user, amount))
         return bool(await bank.can_spend(user, amount))
 
-    async def withdraw_cookies(self, user, amount):
-        if await self.config.is_global():
-            cookies = await self.config.user(user).cookies() - amount
-            await self.config.user(user).cookies.set(cookies)
+    async def withdraw_cookies(self, user, amount, kind="withdraw"):
+        is_global = self.is_global()
+        index = await self._get_account_index(user, is_global)
+        async with self._lock_accounts(is_global, user):
+            self._write_cookies(user, index.get(user.id) - amount, is_global, kind)
+
+    async def spend_cookies(self, user, amount: int, kind: str = "spend") -> int:
+        """Withdraw cookies only if the user can afford them, atomically.
+
+        Returns the new balance. Raises `ValueError` if the user doesn't have enough."""
+        is_global = self.is_global()
+        index = await self._get_account_index(user, is_global)
+        async with self._lock_accounts(is_global, user):
+            cookies = index.get(user.id)
+            if cookies < amount:
+                raise ValueError(f"{user.display_name} doesn't have enough cookies.")
+            self._write_cookies(user, cookies - amount, is_global, kind)
+        return cookies - amount
+
+    async def deposit_cookies(self, user, amount, kind="deposit"):
+        is_global = self.is_global()
+        index = await self._get_account_index(user, is_global)
+        async with self._lock_accounts(is_global, user):
+            self._write_cookies(user, index.get(user.id) + amount, is_global, kind)
+
+    async def transfer(
+        self, src, dst, amount: int, kind: str = "transfer"
+    ) -> typing.Tuple[int, int]:
+        """Move cookies from one account to another atomically.
+
+        Both accounts are locked for the whole operation and each is read and written once.
+        Returns the new balances of `src` and `dst`.
+
+        Raises `ValueError` if the amount isn't positive or `src` can't afford it,
+        and `BalanceTooHigh` if `dst` would go over the maximum balance."""
+        if amount <= 0:
+            raise ValueError("The amount has to be more than 0.")
+        if src.id == dst.id:
+            raise ValueError("Can't transfer cookies to the same account.")
+        is_global = self.is_global()
+        src_index = await self._get_account_index(src, is_global)
+        dst_index = await self._get_account_index(dst, is_global)
+        async with self._lock_accounts(is_global, src, dst):
+            src_cookies = src_index.get(src.id)
+            dst_cookies = dst_index.get(dst.id)
+            if src_cookies < amount:
+                raise ValueError(f"{src.display_name} doesn't have enough cookies.")
+            if self._max_balance_check(dst_cookies + amount):
+                raise errors.BalanceTooHigh(dst.display_name, _MAX_BALANCE, "cookies")
+            self._write_cookies(src, src_cookies - amount, is_global, kind)
+            self._write_cookies(dst, dst_cookies + amount, is_global, kind)
+        return src_cookies - amount, dst_cookies + amount
+
+    async def _set_cookies(self, user, amount, kind="set"):
+        is_global = self.is_global()
+        await self._get_account_index(user, is_global)
+        async with self._lock_accounts(is_global, user):
+            self._write_cookies(user, amount, is_global, kind)
+
+    def _write_cookies(self, user, amount, is_global, kind):
+        """Journal a balance, the account has to be locked and its index loaded.
+
+        The balance is written to Config by the next compaction."""
+        scope = None if is_global else user.guild.id
+        self._apply_balance(scope, user.id, amount, kind)
+        self._unsaved.setdefault(scope, {})[user.id] = amount
+
+    def _apply_balance(self, scope, user_id, amount, kind, flush=True):
+        """Update the in-memory balance of an account and journal it."""
+        index = self._indexes[scope]
+        delta = amount - index.get(user_id)
+        index.set(user_id, amount)
+        self._append_journal(scope, user_id, kind, delta, amount, flush)
+        if scope is not None:
+            pools = [(scope, self._pools.get(scope))]
         else:
-            cookies = await self.config.member(user).cookies() - amount
-            await self.config.member(user).cookies.set(cookies)
+            pools = self._pools.items()
+        for guild_id, pool in pools:
+            if pool is None:
+                continue
+            guild = self.bot.get_guild(guild_id)
+            if guild and guild.get_member(user_id):
+                pool.update(user_id, amount)
+
+    def _append_journal(self, scope, user_id, kind, delta, balance, flush=True):
+        if self._journal is None and self._journal_backlog is None:
+            return
+        entry = {
+            "t": int(time.time()),
+            "s": scope or 0,
+            "u": user_id,
+            "k": kind,
+            "d": delta,
+            "b": balance,
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        if self._journal is None:
+            self._journal_backlog.append(line)
+            return
+        self._journal.write(line)
+        if flush:
+            self._journal.flush()
+
+    def _journal_segments(self) -> typing.List[str]:
+        """Paths of the compacted journal files, from the oldest."""
+        directory = os.path.dirname(self._journal_path)
+        names = [
+            name
+            for name in os.listdir(directory)
+            if name.startswith("journal.") and name != "journal.jsonl"
+        ]
+        names.sort(key=lambda name: int(name.split(".")[1]))
+        return [os.path.join(directory, name) for name in names]
+
+    def _archive_journal(self):
+        """Archive the current journal file and drop the oldest archives."""
+        if os.path.exists(self._journal_path) and os.path.getsize(self._journal_path):
+            directory = os.path.dirname(self._journal_path)
+            os.replace(
+                self._journal_path,
+                os.path.join(directory, f"journal.{time.time_ns()}.jsonl"),
+            )
+            for path in self._journal_segments()[:-_JOURNAL_SEGMENTS]:
+                os.remove(path)
 
-    async def deposit_cookies(self, user, amount):
-        if await self.config.is_global():
-            cookies = await self.config.user(user).cookies() + amount
-            await self.config.user(user).cookies.set(cookies)
-        else:
-            cookies = await self.config.member(user).cookies() + amount
-            await self.config.member(user).cookies.set(cookies)
+    async def _pause_journal(self, func, *args, reopen: bool = True):
+        """Close the journal file, run `func` in an executor and open the file again.
 
-    async def get_cookies(self, user):
-        conf = (
-            self.config.user(user)
-            if await self.config.is_global()
-            else self.config.member(user)
+        Entries journaled in the meantime are written once it's open.
+        The compaction has to be locked."""
+        journal, self._journal = self._journal, None
+        self._journal_backlog = []
+
+        def run():
+            if journal is not None:
+                journal.close()
+            func(*args)
+
+        try:
+            await self.bot.loop.run_in_executor(None, run)
+        finally:
+            try:
+                if reopen:
+                    self._journal = await self.bot.loop.run_in_executor(
+                        None, functools.partial(open, self._journal_path, "a", encoding="utf-8")
+                    )
+            finally:
+                backlog, self._journal_backlog = self._journal_backlog, None
+            # the backlog is older than anything journaled from now on
+            if self._journal is not None and backlog:
+                self._journal.writelines(backlog)
+                self._journal.flush()
+
+    async def _commit_balances(
+        self, unsaved: typing.Dict[typing.Optional[int], typing.Dict[int, int]]
+    ):
+        """Write balances to Config, the writes of a scope run concurrently."""
+        for scope, balances in unsaved.items():
+            if scope is None:
+                account = self.config.user_from_id
+            else:
+                account = functools.partial(self.config.member_from_ids, scope)
+            await asyncio.gather(
+                *(
+                    account(user_id).cookies.set(balance)
+                    for user_id, balance in balances.items()
+                )
+            )
+
+    async def _compact(self, close: bool = False):
+        """Write the journaled balances to Config and start a new journal file."""
+        async with self._compact_lock:
+            unsaved, self._unsaved = self._unsaved, {}
+            await self._commit_balances(unsaved)
+            await self._pause_journal(self._archive_journal, reopen=not close)
+            # balances changed while committing only exist in the archived file
+            for scope, balances in self._unsaved.items():
+                for user_id, balance in balances.items():
+                    self._append_journal(scope, user_id, "carry", 0, balance)
+
+    async def _compact_loop(self):
+        while True:
+            await asyncio.sleep(_COMPACT_INTERVAL)
+            await self._compact()
+
+    async def apply_interest(
+        self, guild: typing.Optional[discord.Guild], percent: float
+    ) -> typing.Tuple[int, float]:
+        """Change every balance of a guild (or every balance if `None`) by `percent` %.
+
+        Balances are capped to the maximum balance and written to Config at once.
+        Returns how many accounts changed and how long it took, in seconds."""
+        started = time.perf_counter()
+        scope = guild.id if guild else None
+        index = await self._load_index(scope, guild)
+        async with self._lock_all_accounts(), self._compact_lock:
+            rate = percent / 100
+            balances = {}
+            for user_id, balance in index.balances.items():
+                if balance <= 0:
+                    continue
+                # a float can't represent big balances exactly, so only the change is one
+                new = min(max(balance + int(balance * rate), 0), _MAX_BALANCE)
+                if new != balance:
+                    balances[user_id] = new
+            await self._write_many(scope, balances, "interest")
+        run = self._interest_runs[scope] = (len(balances), time.perf_counter() - started)
+        return run
+
+    async def _interest_loop(self):
+        await self.bot.wait_until_red_ready()
+        while True:
+            await asyncio.sleep(_INTEREST_CHECK)
+            now = int(time.time())
+            if self.is_global():
+                due = [(None, self.config, await self.config.all())]
+            else:
+                due = []
+                for guild_id, data in (await self.config.all_guilds()).items():
+                    guild = self.bot.get_guild(guild_id)
+                    if guild:
+                        due.append((guild, self.config.guild(guild), data))
+            for guild, conf, data in due:
+                if not data["interest"] or data["nextinterest"] > now:
+                    continue
+                await conf.nextinterest.set(now + data["interestcd"])
+                await self.apply_interest(guild, data["interest"])
+
+    async def _replay_journal(self):
+        """Commit the balances of a journal that wasn't compacted, i.e. after a crash,
+        then start a new journal file."""
+        unsaved = await self.bot.loop.run_in_executor(None, _read_journal, self._journal_path)
+        await self._commit_balances(unsaved)
+        async with self._compact_lock:
+            await self._pause_journal(self._archive_journal)
+
+    def _purge_journal(self, user_id: int):
+        for path in self._journal_segments() + [self._journal_path]:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    lines = [line for line in f if f'"u":{user_id},' not in line]
+                with open(path, "w", encoding="utf-8") as f:
+                    f.writelines(lines)
+            except FileNotFoundError:
+                continue
+
+    def _lock_accounts(self, is_global, *users):
+        """Hold the lock stripes of the accounts."""
+        return self._lock_stripes(
+            {
+                hash((None if is_global else user.guild.id, user.id)) % _LOCK_STRIPES
+                for user in users
+            }
         )
-        return await conf.cookies()
+
+    def _lock_all_accounts(self):
+        return self._lock_stripes(range(_LOCK_STRIPES))
+
+    @contextlib.asynccontextmanager
+    async def _lock_stripes(self, stripes: typing.Iterable[int]):
+        """Stripes are always taken in the same order, so two operations can't deadlock."""
+        async with contextlib.AsyncExitStack() as stack:
+            for stripe in sorted(stripes):
+                await stack.enter_async_context(self._locks[stripe])
+            yield
+
+    async def _write_many(
+        self, scope: typing.Optional[int], balances: typing.Dict[int, int], kind: str
+    ):
+        """Write many balances to Config at once and journal them.
+
+        Every account and the compaction have to be locked, the index has to be loaded."""
+        await self._commit_balances({scope: balances})
+        unsaved = self._unsaved.get(scope, {})
+        for user_id, balance in balances.items():
+            unsaved.pop(user_id, None)
+            self._apply_balance(scope, user_id, balance, kind, flush=False)
+        if self._journal is not None:
+            self._journal.flush()
+
+    async def bulk_update(
+        self,
+        guild: discord.Guild,
+        user_ids: typing.Optional[typing.Iterable[int]],
+        operation: str,
+        amount: int,
+    ) -> typing.Tuple[int, int, int]:
+        """Add, take or set cookies of many accounts at once.
+
+        `user_ids` of `None` means every member of the guild.
+        New balances are computed in one pass and written to Config at once.
+        Returns how many accounts were updated, skipped because they'd go over
+        the maximum balance and skipped because they didn't have enough cookies."""
+        if operation not in ("add", "take", "set"):
+            raise ValueError(f"Unknown operation {operation}.")
+        is_global = self.is_global()
+        scope = None if is_global else guild.id
+        index = await self._load_index(scope, guild)
+        if user_ids is None:
+            user_ids = [member.id for member in guild.members]
+        too_high = too_low = 0
+        async with self._lock_all_accounts(), self._compact_lock:
+            balances = {}
+            for user_id in user_ids:
+                if operation == "add":
+                    balance = index.get(user_id) + amount
+                elif operation == "take":
+                    balance = index.get(user_id) - amount
+                else:
+                    balance = amount
+                if self._max_balance_check(balance):
+                    too_high += 1
+                elif balance < 0:
+                    too_low += 1
+                else:
+                    balances[user_id] = balance
+            await self._write_many(scope, balances, f"bulk {operation}")
+        return len(balances), too_high, too_low
+
+    async def get_top(
+        self, count: int, guild: typing.Optional[discord.Guild] = None
+    ) -> typing.List[typing.Tuple[int, int]]:
+        """(user ID, balance) of the `count` richest accounts.
+
+        With global cookies, only members of `guild` are ranked if it's given.
+        Without them, `guild` is required."""
+        if self.is_global():
+            index = await self._load_index(None)
+            if guild is None:
+                return index.page(0, count)
+            return index.filtered_page(0, count, guild.get_member)[0]
+        if guild is None:
+            raise ValueError("A guild is required with per-guild cookies.")
+        return (await self._load_index(guild.id, guild)).page(0, count)
+
+    @contextlib.asynccontextmanager
+    async def snapshot(self) -> typing.AsyncIterator[CookieSnapshot]:
+        """Read many balances while checking the cookie mode once.
+
+        ```
+        async with cookies_cog.snapshot() as snapshot:
+            balances = await snapshot.get_many(members)
+        ```"""
+        yield CookieSnapshot(self, self.is_global())
+
+    async def get_many_cookies(self, users: typing.Iterable) -> typing.Dict[int, int]:
+        """User ID -> balance of every user."""
+        async with self.snapshot() as snapshot:
+            return await snapshot.get_many(users)
+
+    async def can_spend_many(self, users: typing.Iterable, amount: int) -> bool:
+        """Whether every user can spend `amount`."""
+        async with self.snapshot() as snapshot:
+            return await snapshot.can_spend_many(users, amount)
+
+    async def get_cookies(self, user):
+        is_global = self.is_global()
+        return (await self._get_account_index(user, is_global)).get(user.id)
@@ -1,3 +1,5 @@
+import asyncio
+import bisect
 import discord
 import datetime
 import typing
@@ -5,18 +7,182 @@ import typing
 from discord.utils import get
 
 from redbot.core import Config, checks, commands
-from redbot.core.utils.chat_formatting import pagify, humanize_list
-from redbot.core.utils.menus import menu, DEFAULT_CONTROLS
+from redbot.core.utils.chat_formatting import pagify
+from redbot.core.utils.menus import start_adding_reactions
+from redbot.core.utils.predicates import ReactionPredicate
 
 from redbot.core.bot import Red
 
+_KINDS = ("items", "roles", "games")
+_INVENTORY_PAGE_SIZE = 15
+_ROLE_GRANT_DELAY = 0.5  # seconds bought roles are collected for before they're given
+_ROLE_GRANT_CONCURRENCY = 5  # members given roles at once
+_PREVIOUS = "\N{LEFTWARDS BLACK ARROW}\N{VARIATION SELECTOR-16}"
+_CLOSE = "\N{CROSS MARK}"
+_NEXT = "\N{BLACK RIGHTWARDS ARROW}\N{VARIATION SELECTOR-16}"
+
+
+class Catalog:
+    """Everything a store sells, by name.
+
+    Names are found case-insensitively, or by a prefix that only one name starts with.
+    Roles are stored by ID, their name is an alias kept in the record.
+    Records are copies of the dicts stored in Config, they have to be kept in sync."""
+
+    __slots__ = ("_entries", "_folded", "_sorted", "pages")
+
+    def __init__(self, data: dict):
+        # name -> (kind, Config key, record)
+        self._entries: typing.Dict[str, typing.Tuple[str, str, dict]] = {}
+        for kind in _KINDS:
+            for key, record in data[kind].items():
+                self._entries.setdefault(record.get("name", key), (kind, key, record))
+        self._folded = {name.casefold(): name for name in self._entries}
+        self._sorted = sorted(self._folded)
+        # guild ID -> rendered store pages, roles are only listed where they exist
+        self.pages: typing.Dict[int, typing.List[str]] = {}
+
+    def __iter__(self):
+        return iter(self._entries.items())
+
+    def find(
+        self, name: str, prefix: bool = True
+    ) -> typing.Optional[typing.Tuple[str, str, str, dict]]:
+        """(name, kind, Config key, record) of a thing.
+
+        None if nothing (or several things) match."""
+        if name not in self._entries:
+            folded = name.casefold()
+            name = self._folded.get(folded)
+            if name is None:
+                if not prefix or not folded:
+                    return None
+                i = bisect.bisect_left(self._sorted, folded)
+                matches = self._sorted[i : i + 2]
+                if not matches or not matches[0].startswith(folded):
+                    return None
+                if len(matches) > 1 and matches[1].startswith(folded):
+                    return None  # ambiguous
+                name = self._folded[matches[0]]
+        kind, key, record = self._entries[name]
+        return name, kind, key, record
+
+
+class RoleGrantCancelled(Exception):
+    """Raised to buyers waiting for a role when the grants are cancelled."""
+
+
+class RoleGrants:
+    """Gives bought roles in batches.
+
+    Roles bought around the same time are collected for a moment, then every member
+    gets all of their roles with one request, several members at once."""
+
+    def __init__(self):
+        # (guild ID, member ID) -> (member, roles, future of the request)
+        self._pending: typing.Dict[
+            typing.Tuple[int, int],
+            typing.Tuple[discord.Member, typing.List[discord.Role], asyncio.Future],
+        ] = {}
+        # the batch collecting roles, and the batches giving them
+        self._task: typing.Optional[asyncio.Task] = None
+        self._running: typing.Set[asyncio.Task] = set()
+
+    async def grant(self, member: discord.Member, role: discord.Role):
+        """Give a role, raises `discord.HTTPException` if it couldn't be given,
+        or `RoleGrantCancelled` if the grants were cancelled before it was."""
+        key = (member.guild.id, member.id)
+        if key not in self._pending:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = (member, [], future)
+        _, roles, future = self._pending[key]
+        roles.append(role)
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush())
+        # several buyers can wait for the same request
+        await asyncio.shield(future)
+
+    def cancel(self):
+        """Stop giving roles, everyone still waiting gets `RoleGrantCancelled`."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._running:
+            task.cancel()  # fails its own requests, see `_flush`
+        pending, self._pending = self._pending, {}
+        self._fail(pending)
+
+    @staticmethod
+    def _fail(pending):
+        for _, _, future in pending.values():
+            if not future.done():
+                future.set_exception(RoleGrantCancelled())
+
+    async def _flush(self):
+        await asyncio.sleep(_ROLE_GRANT_DELAY)
+        pending, self._pending = self._pending, {}
+        # roles bought from now on go to the next batch
+        self._task = None
+        task = asyncio.current_task()
+        self._running.add(task)
+        semaphore = asyncio.Semaphore(_ROLE_GRANT_CONCURRENCY)
+
+        async def give(member, roles, future):
+            async with semaphore:
+                try:
+                    await member.add_roles(*roles, reason="Bought in the cookie store")
+                except discord.HTTPException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(None)
+
+        try:
+            await asyncio.gather(*(give(*request) for request in pending.values()))
+        finally:
+            self._running.discard(task)
+            # only does something if the batch was cancelled
+            self._fail(pending)
+
+
+async def _lazy_menu(
+    ctx: commands.Context,
+    page_count: int,
+    get_page: typing.Callable[[int], typing.Awaitable[discord.Embed]],
+    timeout: float = 30.0,
+):
+    """Like redbot's menu, but a page is only rendered once it's displayed."""
+    page = 0
+    message = await ctx.send(embed=await get_page(page))
+    if page_count <= 1:
+        return
+    emojis = [_PREVIOUS, _CLOSE, _NEXT]
+    start_adding_reactions(message, emojis)
+    while True:
+        pred = ReactionPredicate.with_emojis(emojis, message, ctx.author)
+        try:
+            await ctx.bot.wait_for("reaction_add", check=pred, timeout=timeout)
+        except asyncio.TimeoutError:
+            try:
+                await message.clear_reactions()
+            except (discord.Forbidden, discord.NotFound):
+                pass
+            return
+        if emojis[pred.result] == _CLOSE:
+            return await message.delete()
+        page = (page + pred.result - 1) % page_count
+        try:
+            await message.remove_reaction(emojis[pred.result], ctx.author)
+        except (discord.Forbidden, discord.NotFound):
+            pass
+        await message.edit(embed=await get_page(page))
+
 
 class CookieStore(commands.Cog):
     """
     Additional store with redeemable items to my Cookies cog.
     """
 
-    __version__ = "1.1.0"
+    __version__ = "1.2.0"
 
     def __init__(self, bot: Red):
         self.bot = bot
@@ -24,19 +190,55 @@ class CookieStore(commands.Cog):
             self, identifier=16548964843212315, force_registration=True
         )
         self.config.register_guild(
-            enabled=False, items={}, roles={}, games={}, ping=None
+            enabled=False, items={}, roles={}, games={}, ping=None, queue=False
         )
         self.config.register_global(
-            is_global=False, enabled=False, items={}, roles={}, games={}, ping=None
+            is_global=False,
+            enabled=False,
+            items={},
+            roles={},
+            games={},
+            ping=None,
+            queue=False,
         )
 
         self.config.register_member(inventory={})
         self.config.register_user(inventory={})
 
+        self._is_global = False  # loaded by initialize, changed by the gg command
+        # guild ID (or None when global) -> catalog, loaded on first use
+        self._catalogs: typing.Dict[typing.Optional[int], Catalog] = {}
+        # (guild ID or None, kind, Config key) -> stock left after reservations,
+        # kept across catalog reloads until the stock is set again
+        self._stock: typing.Dict[typing.Tuple[typing.Optional[int], str, str], int] = {}
+        self._role_grants = RoleGrants()
+        # (guild ID or None, name) -> lock, for writing the stock of an item in order
+        self._stock_locks: typing.Dict[typing.Tuple[typing.Optional[int], str], asyncio.Lock] = {}
+        # (guild ID or None, name) -> lock, buyers wait for it in queue mode
+        self._queue_locks: typing.Dict[typing.Tuple[typing.Optional[int], str], asyncio.Lock] = {}
+
+    async def initialize(self):
+        self._is_global = await self.config.is_global()
+        await self._migrate_roles()
+
+    def is_global(self) -> bool:
+        """Whether the cog is global, without reading Config."""
+        return self._is_global
+
+    def cog_unload(self):
+        self._role_grants.cancel()
+
     async def red_delete_data_for_user(self, *, requester, user_id):
         await self.config.user_from_id(user_id).clear()
-        for guild in self.bot.guilds:
-            await self.config.member_from_ids(guild.id, user_id).clear()
+        # only the guilds the user has an inventory in are cleared
+        members = await self.config.all_members()
+        await asyncio.gather(
+            *(
+                self.config.member_from_ids(guild_id, user_id).clear()
+                for guild_id, guild_members in members.items()
+                if user_id in guild_members
+            )
+        )
 
     def format_help_for_context(self, ctx: commands.Context) -> str:
         context = super().format_help_for_context(ctx)
@@ -56,7 +258,7 @@ class CookieStore(commands.Cog):
         confirmation: typing.Optional[bool],
     ):
         """Switch from per-guild to global cookie store and vice versa."""
-        if await self.config.is_global() == make_global:
+        if self.is_global() == make_global:
             return await ctx.send("Uh oh, you're not really changing anything.")
         if not confirmation:
             return await ctx.send(
@@ -68,6 +270,9 @@ class CookieStore(commands.Cog):
         await self.config.clear_all_guilds()
         await self.config.clear_all_globals()
         await self.config.is_global.set(make_global)
+        self._is_global = make_global
+        self._catalogs.clear()
+        self._stock.clear()
         await ctx.send(
             f"Cookie store is now {'global' if make_global else 'per-guild'}."
         )
@@ -96,11 +301,15 @@ class CookieStore(commands.Cog):
         if self._over_zero(price, quantity):
             return await ctx.send("Uh oh, price/quantity have to be over 0.")
         conf = await self._get_conf_group(ctx.guild)
-        if await conf.roles.get_raw(role):
+        if str(role.id) in await conf.roles() or (
+            await self._get_catalog(ctx.guild)
+        ).find(role.name, prefix=False):
             return await ctx.send(f"Uh oh, {role.name} is already registered.")
         await conf.roles.set_raw(
-            role.name, value={"price": price, "quantity": quantity}
+            str(role.id), value={"name": role.name, "price": price, "quantity": quantity}
         )
+        self._drop_stock(ctx.guild, "roles", str(role.id))
+        self._reset_catalog(ctx.guild)
         await ctx.tick()
 
     @cookiestoreset_add.command(name="item")
@@ -111,7 +320,7 @@ class CookieStore(commands.Cog):
         if self._over_zero(price, quantity):
             return await ctx.send("Uh oh, price/quantity have to be over 0.")
         conf = await self._get_conf_group(ctx.guild)
-        if await conf.items.get_raw(item):
+        if (await self._get_catalog(ctx.guild)).find(item, prefix=False):
             return await ctx.send(f"Uh oh, {item} is already registered.")
         await conf.items.set_raw(
             item,
@@ -121,6 +330,8 @@ class CookieStore(commands.Cog):
                 "redeemable": redeem,
             },
         )
+        self._drop_stock(ctx.guild, "items", item)
+        self._reset_catalog(ctx.guild)
         await ctx.tick()
 
     @cookiestoreset_add.command(name="game")
@@ -131,7 +342,7 @@ class CookieStore(commands.Cog):
         if self._over_zero(price, quantity):
             return await ctx.send("Uh oh, price/quantity have to be over 0.")
         conf = await self._get_conf_group(ctx.guild)
-        if await conf.games.get_raw(game):
+        if (await self._get_catalog(ctx.guild)).find(game, prefix=False):
             return await ctx.send(f"Uh oh, {game} is already registered.")
         await conf.games.set_raw(
             game,
@@ -141,6 +352,8 @@ class CookieStore(commands.Cog):
                 "redeemable": redeem,
             },
         )
+        self._drop_stock(ctx.guild, "games", game)
+        self._reset_catalog(ctx.guild)
         await ctx.tick()
 
     @cookiestoreset.group(name="remove")
@@ -153,49 +366,47 @@ class CookieStore(commands.Cog):
     ):
         """Remove a purchasable role."""
         conf = await self._get_conf_group(ctx.guild)
-        if not await conf.roles.get_raw(role):
+        roles = await conf.roles()
+        key = str(role.id) if str(role.id) in roles else role.name
+        if key not in roles:
             return await ctx.send(f"Uh oh, {role.name} is not registered.")
-        await conf.roles.clear_raw(role)
+        await conf.roles.clear_raw(key)
+        self._drop_stock(ctx.guild, "roles", key)
+        self._reset_catalog(ctx.guild)
         await ctx.tick()
 
     @cookiestoreset_remove.command(name="item")
     async def cookiestoreset_remove_item(self, ctx: commands.Context, item: str):
         """Remove a purchasable item."""
         conf = await self._get_conf_group(ctx.guild)
-        if not await conf.items.get_raw(item):
+        found = (await self._get_catalog(ctx.guild)).find(item, prefix=False)
+        if not found or found[1] != "items":
             return await ctx.send(f"Uh oh, {item} is not registered.")
-        await conf.items.clear_raw(item)
+        await conf.items.clear_raw(found[2])
+        self._drop_stock(ctx.guild, "items", found[2])
+        self._reset_catalog(ctx.guild)
         await ctx.tick()
 
     @cookiestoreset_remove.command(name="game")
     async def cookiestoreset_remove_game(self, ctx: commands.Context, game: str):
         """Remove a purchasable game."""
         conf = await self._get_conf_group(ctx.guild)
-        if not await conf.games.get_raw(game):
+        found = (await self._get_catalog(ctx.guild)).find(game, prefix=False)
+        if not found or found[1] != "games":
             return await ctx.send(f"Uh oh, {game} is not registered.")
-        await conf.games.clear_raw(game)
+        await conf.games.clear_raw(found[2])
+        self._drop_stock(ctx.guild, "games", found[2])
+        self._reset_catalog(ctx.guild)
         await ctx.tick()
 
     @cookiestoreset.command(name="show")
     async def cookiestoreset_show(self, ctx: commands.Context, *, item: str):
         """Show information about a purchasable item/role/game key."""
-        item = item.strip("@")
-        conf = await self._get_conf_group(ctx.guild)
-        items = await conf.items.get_raw()
-        roles = await conf.roles.get_raw()
-        games = await conf.games.get_raw()
-
-        if item in items:
-            info = await conf.items.get_raw(item)
-            item_type = "item"
-        elif item in roles:
-            info = await conf.roles.get_raw(item)
-            item_type = "role"
-        elif item in games:
-            info = await conf.games.get_raw(item)
-            item_type = "game"
-        else:
+        found = (await self._get_catalog(ctx.guild)).find(item.strip("@"))
+        if not found:
             return await ctx.send("This item isn't buyable.")
+        item, item_type, _, info = found
+        item_type = item_type[:-1]
         price = info.get("price")
         quantity = info.get("quantity")
         redeemable = info.get("redeemable")
@@ -213,21 +424,28 @@ class CookieStore(commands.Cog):
         if self._over_zero(quantity):
             return await ctx.send("Uh oh, quantity has to be more than 0.")
         conf = await self._get_conf_group(ctx.guild)
-        items = await conf.items.get_raw()
-        roles = await conf.roles.get_raw()
-        games = await conf.games.get_raw()
-
-        if item in items:
-            await conf.items.set_raw(item, "quantity", value=quantity)
-            await ctx.tick()
-        elif item in roles:
-            await conf.roles.set_raw(item, "quantity", value=quantity)
-            await ctx.tick()
-        elif item in games:
-            await conf.games.set_raw(item, "quantity", value=quantity)
-            await ctx.tick()
-        else:
-            await ctx.send("This item isn't in the store. Please, add it first.")
+        found = (await self._get_catalog(ctx.guild)).find(item, prefix=False)
+        if not found:
+            return await ctx.send("This item isn't in the store. Please, add it first.")
+        _, kind, key, _ = found
+        await conf.get_attr(kind).set_raw(key, "quantity", value=quantity)
+        self._drop_stock(ctx.guild, kind, key)
+        self._reset_catalog(ctx.guild)
+        await ctx.tick()
+
+    @cookiestoreset.command(name="queue")
+    async def cookiestoreset_queue(
+        self, ctx: commands.Context, on_off: typing.Optional[bool]
+    ):
+        """Toggle queue mode, for flash sales of limited items.
+
+        Buyers of an item are served one by one, in the order they used `[p]buy`,
+        and turned away right away once it's sold out.
+        If `on_off` is not provided, the state will be flipped."""
+        conf = await self._get_conf_group(ctx.guild)
+        target_state = on_off if on_off is not None else not (await conf.queue())
+        await conf.queue.set(target_state)
+        await ctx.send(f"Queue mode is now {'enabled' if target_state else 'disabled'}.")
 
     @cookiestoreset.command(name="ping")
     async def cookiestoreset_ping(
@@ -273,6 +491,10 @@ class CookieStore(commands.Cog):
             await conf.roles.clear_raw(r)
         for g in await conf.games.get_raw():
             await conf.games.clear_raw(g)
+        scope = None if self.is_global() else ctx.guild.id
+        for stock_key in [stock_key for stock_key in self._stock if stock_key[0] == scope]:
+            del self._stock[stock_key]
+        self._reset_catalog(ctx.guild)
         await ctx.send("All items have been deleted from the store.")
 
     @cookiestoreset_reset.command(name="nventories")
@@ -285,7 +507,7 @@ class CookieStore(commands.Cog):
                 "This will delete **all** items from all members' inventories. This action **cannot** be undone.\n"
                 f"If you're sure, type `{ctx.clean_prefix}cookiestoreset reset inventories yes`."
             )
-        if await self.config.is_global():
+        if self.is_global():
             await self.config.clear_all_users()
         else:
             await self.config.clear_all_members(ctx.guild)
@@ -294,7 +516,7 @@ class CookieStore(commands.Cog):
     @cookiestoreset.command(name="settings")
     async def cookiestoreset_settings(self, ctx: commands.Context):
         """See current settings."""
-        is_global = await self.config.is_global()
+        is_global = self.is_global()
         data = (
             await self.config.all()
             if is_global
@@ -313,6 +535,7 @@ class CookieStore(commands.Cog):
         embed.add_field(name="Global:", value=str(is_global))
         embed.add_field(name="Enabled*:", value=str(data["enabled"]))
         embed.add_field(name="Ping*:", value=ping)
+        embed.add_field(name="Queue mode:", value=str(data["queue"]))
         embed.add_field(
             name="Items:", value=f"`{ctx.clean_prefix}shop` to see all available items."
         )
@@ -327,11 +550,7 @@ class CookieStore(commands.Cog):
         enabled = await conf.enabled()
         if not enabled:
             return await ctx.send("Uh oh, store is disabled.")
-        page_list = await self._show_store(ctx)
-        if len(page_list) > 1:
-            await menu(ctx, page_list, DEFAULT_CONTROLS)
-        else:
-            await ctx.send(embed=page_list[0])
+        await self._send_store(ctx)
 
     @commands.command()
     @commands.guild_only()
@@ -342,145 +561,82 @@ class CookieStore(commands.Cog):
         if not enabled:
             return await ctx.send("Uh oh, store is disabled.")
 
-        cookies_cog = self.bot.get_cog("Cookies").config
-        if await cookies_cog.is_global():
-            cookies = await cookies_cog.user(ctx.author).cookies()
-        else:
-            cookies = await cookies_cog.member(ctx.author).cookies()
-        items = await conf.items.get_raw()
-        roles = await conf.roles.get_raw()
-        games = await conf.games.get_raw()
-
-        if not item:
-            page_list = await self._show_store(ctx)
-            if len(page_list) > 1:
-                return await menu(ctx, page_list, DEFAULT_CONTROLS)
-            return await ctx.send(embed=page_list[0])
-        item = item.strip("@")
+        catalog = await self._get_catalog(ctx.guild)
+        found = catalog.find(item.strip("@")) if item else None
+        if not found:
+            return await self._send_store(ctx)
+        item, kind, key, info = found
         inventory = await self.config.member(ctx.author).inventory.get_raw()
         if item in inventory:
             return await ctx.send("You already own this item.")
-        if item in roles:
-            role_obj = get(ctx.guild.roles, name=item)
-            if role_obj:
-                role = await conf.roles.get_raw(item)
-                price = int(role.get("price"))
-                quantity = int(role.get("quantity"))
-                if quantity == 0:
-                    return await ctx.send("Uh oh, this item is out of stock.")
-                if price > cookies:
-                    return await ctx.send("You don't have enough cookies!")
-                await ctx.author.add_roles(role_obj)
-                cookies -= price
-                quantity -= 1
-                await self.bot.get_cog("Cookies").config.member(ctx.author).cookies.set(
-                    cookies
-                )
-                await self.config.member(ctx.author).inventory.set_raw(
-                    item,
-                    value={
-                        "price": price,
-                        "is_role": True,
-                        "is_game": False,
-                        "redeemable": False,
-                        "redeemed": True,
-                    },
-                )
-                await conf.roles.set_raw(item, "quantity", value=quantity)
-                await ctx.send(f"You have bought {item}.")
-            else:
-                await ctx.send("Uh oh, can't find the role.")
-        elif item in items:
-            item_info = await conf.items.get_raw(item)
-            price = int(item_info.get("price"))
-            quantity = int(item_info.get("quantity"))
-            redeemable = item_info.get("redeemable")
-            if not redeemable:
-                redeemable = False
-            if quantity == 0:
-                return await ctx.send("Uh oh, this item is out of stock.")
-            if price > cookies:
-                return await ctx.send("You don't have enough cookies!")
-            cookies -= price
-            quantity -= 1
-            await self.bot.get_cog("Cookies").config.member(ctx.author).cookies.set(
-                cookies
-            )
-            await conf.items.set_raw(item, "quantity", value=quantity)
-            if redeemable:
-                await self.config.member(ctx.author).inventory.set_raw(
-                    item,
-                    value={
-                        "price": price,
-                        "is_role": False,
-                        "is_game": False,
-                        "redeemable": True,
-                        "redeemed": False,
-                    },
-                )
-                await ctx.send(
-                    f"You have bought {item}. You may now redeem it with `{ctx.clean_prefix}redeem {item}`"
-                )
-            else:
-                await self.config.member(ctx.author).inventory.set_raw(
-                    item,
-                    value={
-                        "price": price,
-                        "is_role": False,
-                        "is_game": False,
-                        "redeemable": False,
-                        "redeemed": True,
-                    },
+        role_obj = None
+        if kind == "roles":
+            role_obj = self._get_role(ctx.guild, key, info)
+            if not role_obj:
+                return await ctx.send("Uh oh, can't find the role.")
+        queue = await conf.queue()
+        # there's no await between checking and taking the stock, so it can't be oversold
+        if not self._take_stock(ctx.guild, catalog, kind, key, info):
+            return await ctx.send("Uh oh, this item is out of stock.")
+        price = int(info.get("price"))
+        if not queue:
+            charged = await self._charge(ctx, kind, key, price)
+        else:
+            queue_key = (None if self.is_global() else ctx.guild.id, key)
+            # asyncio locks wake their waiters in order, so buyers are charged first come
+            # first served; the stock is already reserved, so only the charge is queued
+            async with self._queue_locks.setdefault(queue_key, asyncio.Lock()):
+                charged = await self._charge(ctx, kind, key, price)
+        if charged:
+            await self._purchase(ctx, item, kind, key, price, info, role_obj)
+
+    async def _charge(self, ctx: commands.Context, kind: str, key: str, price: int) -> bool:
+        """Charge for a reserved item, or give the reservation back if it can't be paid."""
+        try:
+            await self.bot.get_cog("Cookies").spend_cookies(ctx.author, price, kind="store")
+        except ValueError:
+            self._give_back_stock(ctx.guild, kind, key)
+            await ctx.send("You don't have enough cookies!")
+            return False
+        return True
+
+    async def _purchase(
+        self,
+        ctx: commands.Context,
+        item: str,
+        kind: str,
+        key: str,
+        price: int,
+        info: dict,
+        role_obj,
+    ):
+        """Give a paid item and commit, or refund it and give the reservation back on failure."""
+        redeemable = bool(info.get("redeemable")) and not role_obj
+        if role_obj:
+            try:
+                await self._role_grants.grant(ctx.author, role_obj)
+            except (discord.HTTPException, RoleGrantCancelled):
+                self._give_back_stock(ctx.guild, kind, key)
+                await self.bot.get_cog("Cookies").deposit_cookies(
+                    ctx.author, price, kind="store"
                 )
-                await ctx.send(f"You have bought {item}.")
-        elif item in games:
-            game_info = await self._show_thing(ctx, 2, item)
-            price = int(game_info.get("price"))
-            quantity = int(game_info.get("quantity"))
-            redeemable = game_info.get("redeemable")
-            if not redeemable:
-                redeemable = False
-            if quantity == 0:
-                return await ctx.send("Uh oh, this item is out of stock.")
-            if price > cookies:
-                return await ctx.send("You don't have enough cookies!")
-            cookies -= price
-            quantity -= 1
-            await self.bot.get_cog("Cookies").config.member(ctx.author).cookies.set(
-                cookies
+                return await ctx.send("Uh oh, I couldn't give you the role.")
+        await self._save_stock(ctx.guild, kind, key)
+        record = {
+            "price": price,
+            "is_role": kind == "roles",
+            "is_game": kind == "games",
+            "redeemable": redeemable,
+            "redeemed": not redeemable,
+        }
+        if role_obj:
+            record["role_id"] = role_obj.id
+        await self.config.member(ctx.author).inventory.set_raw(item, value=record)
+        if redeemable:
+            return await ctx.send(
+                f"You have bought {item}. You may now redeem it with `{ctx.clean_prefix}redeem {item}`"
             )
-            await conf.games.set_raw(item, "quantity", value=quantity)
-            if redeemable:
-                await self.config.member(ctx.author).inventory.set_raw(
-                    item,
-                    value={
-                        "price": price,
-                        "is_role": False,
-                        "is_game": True,
-                        "redeemable": True,
-                        "redeemed": False,
-                    },
-                )
-                await ctx.send(
-                    f"You have bought {item}. You may now redeem it with `{ctx.clean_prefix}redeem {item}`"
-                )
-            else:
-                await self.config.member(ctx.author).inventory.set_raw(
-                    item,
-                    value={
-                        "price": price,
-                        "is_role": False,
-                        "is_game": True,
-                        "redeemable": False,
-                        "redeemed": True,
-                    },
-                )
-                await ctx.send(f"You have bought {item}.")
-        else:
-            page_list = await self._show_store(ctx)
-            if len(page_list) > 1:
-                return await menu(ctx, page_list, DEFAULT_CONTROLS)
-            return await ctx.send(embed=page_list[0])
+        await ctx.send(f"You have bought {item}.")
 
     @commands.command(name="return")
     @commands.guild_only()
@@ -490,21 +646,18 @@ class CookieStore(commands.Cog):
         enabled = await conf.enabled()
         if not enabled:
             return await ctx.send("Uh oh, store is disabled.")
-        cookies = int(
-            await self.bot.get_cog("Cookies").config.member(ctx.author).cookies()
-        )
         inventory = await self.config.member(ctx.author).inventory.get_raw()
 
         if item not in inventory:
             return await ctx.send("You don't own this item.")
-        info = await self.config.member(ctx.author).inventory.get_raw(item)
+        info = inventory[item]
 
         is_game = info.get("is_game")
         if is_game:
             return await ctx.send("This item isn't returnable.")
         is_role = info.get("is_role")
         if is_role:
-            role_obj = get(ctx.guild.roles, name=item)
+            role_obj = self._get_owned_role(ctx.guild, item, info)
             if role_obj:
                 await ctx.author.remove_roles(role_obj)
         redeemed = info.get("redeemed")
@@ -513,10 +666,9 @@ class CookieStore(commands.Cog):
         if redeemed:
             return await ctx.send("You can't return an item you have redeemed.")
         price = int(info.get("price"))
-        return_price = price * 0.5
-        cookies += return_price
+        return_price = int(price * 0.5)
         await self.config.member(ctx.author).inventory.clear_raw(item)
-        await self.bot.get_cog("Cookies").config.member(ctx.author).cookies.set(cookies)
+        await self.bot.get_cog("Cookies").deposit_cookies(ctx.author, return_price)
         await ctx.send(
             f"You have returned {item} and got {return_price} :cookie: back."
         )
@@ -525,28 +677,41 @@ class CookieStore(commands.Cog):
     @commands.guild_only()
     async def inventory(self, ctx: commands.Context):
         """See all items you own."""
-        inventory = await self.config.member(ctx.author).inventory.get_raw()
-
-        lst = []
-        for i in inventory:
-            info = await self.config.member(ctx.author).inventory.get_raw(i)
-            if not info.get("is_role"):
-                lst.append(i)
-            else:
-                role_obj = get(ctx.guild.roles, name=i)
-                lst.append(role_obj.mention)
-        desc = "Nothing to see here." if lst == [] else humanize_list(lst)
-        embed = discord.Embed(
-            description=desc,
-            colour=ctx.author.colour,
-            timestamp=datetime.datetime.now(),
-        )
-        embed.set_author(
-            name=f"{ctx.author.display_name}'s inventory",
-            icon_url=ctx.author.avatar_url,
-        )
-
-        await ctx.send(embed=embed)
+        inventory = await self.config.member(ctx.author).inventory()
+        by_kind = {kind: [] for kind in _KINDS}
+        for name, info in inventory.items():
+            by_kind[self._inventory_kind(info)].append((name, info))
+        lines = []
+        for kind, title in (("roles", "Roles"), ("items", "Items"), ("games", "Games")):
+            for name, info in sorted(by_kind[kind], key=lambda entry: entry[0].casefold()):
+                if kind == "roles":
+                    role_obj = self._get_owned_role(ctx.guild, name, info)
+                    name = role_obj.mention if role_obj else name
+                lines.append((title, name))
+        page_count = max(-(-len(lines) // _INVENTORY_PAGE_SIZE), 1)
+
+        async def get_page(page: int) -> discord.Embed:
+            start = page * _INVENTORY_PAGE_SIZE
+            embed = discord.Embed(
+                colour=ctx.author.colour,
+                timestamp=datetime.datetime.now(),
+            )
+            embed.set_author(
+                name=f"{ctx.author.display_name}'s inventory",
+                icon_url=ctx.author.avatar_url,
+            )
+            groups = {}
+            for title, name in lines[start : start + _INVENTORY_PAGE_SIZE]:
+                groups.setdefault(title, []).append(name)
+            if not groups:
+                embed.description = "Nothing to see here."
+            for title, names in groups.items():
+                embed.add_field(name=f"{title}:", value="\n".join(names), inline=False)
+            if page_count > 1:
+                embed.set_footer(text=f"Page {page + 1}/{page_count}")
+            return embed
+
+        await _lazy_menu(ctx, page_count, get_page)
 
     @inventory.command(name="remove")
     @commands.guild_only()
@@ -565,7 +730,7 @@ class CookieStore(commands.Cog):
         inventory = await self.config.member(ctx.author).inventory.get_raw()
         if item not in inventory:
             return await ctx.send("You don't own this item.")
-        info = await self.config.member(ctx.author).inventory.get_raw(item)
+        info = inventory[item]
         is_role = info.get("is_role")
         if is_role:
             return await ctx.send("Roles aren't redeemable.")
@@ -602,54 +767,58 @@ class CookieStore(commands.Cog):
             item, "redeemed", value=True
         )
 
-    async def _show_store(self, ctx):
-        items = await self._show_thing(ctx, 0, "None")
-        roles = await self._show_thing(ctx, 1, "None")
-        games = await self._show_thing(ctx, 2, "None")
-        list_of_lists = [items, roles, games]
-        stuff = []
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.name == after.name:
+            return
+        conf = await self._get_conf_group(after.guild)
+        if str(after.id) in await conf.roles():
+            await conf.roles.set_raw(str(after.id), "name", value=after.name)
+            self._reset_catalog(after.guild)
+        else:
+            self._reset_pages(after.guild)
 
-        for index, list_of_objects in enumerate(list_of_lists):
-            for _object in list_of_objects:
-                if _object in roles:
-                    role_obj = get(ctx.guild.roles, name=_object)
-                    if not role_obj:
-                        continue
-                thing = await self._show_thing(ctx, index, _object)
-                stuff.append(
-                    f"__Item:__ **{_object}** | "
-                    f"__Price:__ {thing.get('price')} :cookie: | "
-                    f"__Quantity:__ {thing.get('quantity')}"
-                )
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self._reset_pages(role.guild)
 
-        desc = "Nothing to see here." if stuff == [] else "\n".join(stuff)
-        page_list = []
-        for page in pagify(desc, delims=["\n"], page_length=1000):
+    async def _send_store(self, ctx: commands.Context):
+        pages = await self._get_store_pages(ctx.guild)
+
+        async def get_page(page: int) -> discord.Embed:
             embed = discord.Embed(
                 colour=await ctx.embed_colour(),
-                description=page,
+                description=pages[page],
                 timestamp=datetime.datetime.now(),
             )
             embed.set_author(
                 name=f"{ctx.guild.name}'s cookie store",
                 icon_url=ctx.guild.icon_url,
             )
-            page_list.append(embed)
-        return page_list
+            return embed
 
-    async def _show_thing(self, ctx, number, item_name):
-        conf = await self._get_conf_group(ctx.guild)
-        if number == 0:
-            if item_name == "None":
-                return await conf.items.get_raw()
-            return await conf.items.get_raw(item_name)
-        if number == 1:
-            if item_name == "None":
-                return await conf.roles.get_raw()
-            return await conf.roles.get_raw(item_name)
-        if item_name == "None":
-            return await conf.games.get_raw()
-        return await conf.games.get_raw(item_name)
+        await _lazy_menu(ctx, len(pages), get_page)
+
+    async def _get_store_pages(self, guild) -> typing.List[str]:
+        """Text of the store pages, kept until the catalog or a quantity changes."""
+        catalog = await self._get_catalog(guild)
+        pages = catalog.pages.get(guild.id)
+        if pages is not None:
+            return pages
+        stuff = []
+        for name, (kind, key, thing) in catalog:
+            if kind == "roles" and not self._get_role(guild, key, thing):
+                continue
+            stuff.append(
+                f"__Item:__ **{name}** | "
+                f"__Price:__ {thing.get('price')} :cookie: | "
+                f"__Quantity:__ {thing.get('quantity')}"
+            )
+        desc = "Nothing to see here." if stuff == [] else "\n".join(stuff)
+        pages = catalog.pages[guild.id] = list(
+            pagify(desc, delims=["\n"], page_length=1000)
+        )
+        return pages
 
     @staticmethod
     def _over_zero(one: int, two: typing.Optional[int]):
@@ -657,8 +826,134 @@ class CookieStore(commands.Cog):
 
     async def _get_conf_group(self, guild):
         return (
-            self.config if await self.config.is_global() else self.config.guild(guild)
+            self.config if self.is_global() else self.config.guild(guild)
         )
 
+    async def _get_catalog(self, guild) -> Catalog:
+        key = None if self.is_global() else guild.id
+        catalog = self._catalogs.get(key)
+        if catalog is None:
+            conf = await self._get_conf_group(guild)
+            catalog = Catalog(await conf.all())
+            # Config doesn't have the reservations of unfinished purchases yet
+            for _, (kind, config_key, record) in catalog:
+                stock = self._stock.get((key, kind, config_key))
+                if stock is not None:
+                    record["quantity"] = stock
+            self._catalogs[key] = catalog
+        return catalog
+
+    def _take_stock(self, guild, catalog: Catalog, kind: str, key: str, info: dict) -> bool:
+        """Reserve one of an item, False if it's out of stock."""
+        stock_key = (None if self.is_global() else guild.id, kind, key)
+        stock = self._stock.get(stock_key, int(info.get("quantity")))
+        if stock <= 0:
+            return False
+        self._stock[stock_key] = info["quantity"] = stock - 1
+        catalog.pages.clear()
+        return True
+
+    def _give_back_stock(self, guild, kind: str, key: str):
+        """Undo a reservation of `_take_stock`."""
+        stock_key = (None if self.is_global() else guild.id, kind, key)
+        if stock_key not in self._stock:
+            return  # the stock was set in the meantime
+        self._stock[stock_key] += 1
+        # the reserved record may belong to an old catalog, the next one gets the stock
+        self._reset_catalog(guild)
+
+    def _drop_stock(self, guild, kind: str, key: str):
+        """Forget the stock of an item, after its quantity was set in Config."""
+        self._stock.pop((None if self.is_global() else guild.id, kind, key), None)
+
+    async def _save_stock(self, guild, kind: str, key: str):
+        """Write the reserved stock of an item, writes of the same item happen in order."""
+        scope = None if self.is_global() else guild.id
+        conf = await self._get_conf_group(guild)
+        async with self._stock_locks.setdefault((scope, key), asyncio.Lock()):
+            # always the latest stock, even if other purchases finished in the meantime
+            stock = self._stock.get((scope, kind, key))
+            if stock is None:
+                return
+            # the item may have been removed while it was bought
+            if await conf.get_attr(kind).get_raw(key, "price", default=None) is None:
+                return
+            await conf.get_attr(kind).set_raw(key, "quantity", value=stock)
+
+    def _reset_pages(self, guild):
+        """Drop the store pages of a guild, e.g. when its roles change."""
+        for catalog in self._catalogs.values():
+            catalog.pages.pop(guild.id, None)
+
+    def _reset_catalog(self, guild):
+        self._catalogs.pop(None if self.is_global() else guild.id, None)
+
+    async def get_inventories(
+        self, members: typing.Iterable[discord.Member]
+    ) -> typing.Dict[int, typing.Dict[str, dict]]:
+        """Member ID -> inventory (item name -> info) of many members.
+
+        The members of each guild are read at once."""
+        by_guild = {}
+        for member in members:
+            by_guild.setdefault(member.guild, []).append(member.id)
+        inventories = {}
+        for guild, member_ids in by_guild.items():
+            data = await self.config.all_members(guild)
+            for member_id in member_ids:
+                inventories[member_id] = data.get(member_id, {}).get("inventory", {})
+        return inventories
+
+    @staticmethod
+    def _get_role(guild, key: str, record: dict) -> typing.Optional[discord.Role]:
+        """The role of a role product."""
+        if "name" in record:
+            return guild.get_role(int(key))
+        return get(guild.roles, name=key)  # stored by name, before 1.2.0
+
+    @staticmethod
+    def _get_owned_role(guild, name: str, info: dict) -> typing.Optional[discord.Role]:
+        """The role of a bought role."""
+        if info.get("role_id"):
+            return guild.get_role(info["role_id"])
+        return get(guild.roles, name=name)  # bought before 1.2.0
+
+    async def _migrate_roles(self):
+        """Store role products by role ID instead of name (before 1.2.0).
+
+        Roles that can't be found are left as they are and tried again next time."""
+        scopes = [(None, await self.config.roles())] if self.is_global() else []
+        for guild_id, data in (await self.config.all_guilds()).items():
+            scopes.append((guild_id, data["roles"]))
+        for guild_id, roles in scopes:
+            if all("name" in record for record in roles.values()):
+                continue
+            guilds = [self.bot.get_guild(guild_id)] if guild_id else self.bot.guilds
+            conf = self.config.guild_from_id(guild_id) if guild_id else self.config
+            async with conf.roles() as stored:
+                for name, record in roles.items():
+                    if "name" in record:
+                        continue
+                    found = [
+                        role
+                        for guild in guilds
+                        if guild
+                        for role in guild.roles
+                        if role.name == name
+                    ]
+                    if len(found) != 1:
+                        continue  # missing, or ambiguous in global mode
+                    role = found[0]
+                    del stored[name]
+                    stored[str(role.id)] = dict(record, name=role.name)
+
+    @staticmethod
+    def _inventory_kind(info: dict) -> str:
+        if info.get("is_role"):
+            return "roles"
+        if info.get("is_game"):
+            return "games"
+        return "items"
+
     async def _get_user_conf(self, is_global, user):
         return self.config.user(user) if is_global else self.config.member(user)
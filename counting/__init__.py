@@ -1,5 +1,7 @@
 from .counting import Counting
 
 
-def setup(bot):
-    bot.add_cog(Counting(bot))
+async def setup(bot):
+    cog = Counting(bot)
+    await cog.initialize()
+    bot.add_cog(cog)
@@ -1,21 +1,295 @@
 import asyncio
 import discord
+import bisect
+import heapq
+import itertools
+import time
 import typing
 import datetime
 
+from collections import OrderedDict
 from discord.utils import get, find
 
 from redbot.core import Config, checks, commands
+from redbot.core.utils.chat_formatting import box
 
 from redbot.core.bot import Red
 
+_FLUSH_INTERVAL = 30  # seconds between write-behind flushes
+_MAX_UNSAVED = 25  # counts that may be held in memory before forcing a flush
+_RECENT_SIZE = 50  # accepted counts remembered per channel
+_HISTORY_FALLBACK = 25  # messages fetched when a deleted count isn't remembered
+_DELETE_DELAY = 0.5  # seconds to gather rejected messages before deleting them
+_BULK_LIMIT = 100  # maximum amount of messages in one bulk delete
+_RECONCILE_RUN = 3  # contiguous counts needed to trust the history over the saved counter
+_RECONCILE_SCAN = 500  # maximum amount of messages read while reconciling
+_RECONCILE_CONCURRENCY = 5  # channels reconciled at the same time
+_RESET_MESSAGE = "Counting has been reset."
+
+_CHANNEL_DEFAULTS = {
+    "previous": 0,
+    "last": 0,
+    "goal": 0,
+    "whitelist": None,
+    "warning": False,
+    "seconds": 0,
+}
+_LEGACY_KEYS = ("channel", *_CHANNEL_DEFAULTS)
+_TOP_SIZE = 10  # members shown by [p]counttop
+
+
+class RecentCounts:
+    """Bounded buffer of the latest accepted counts.
+
+    Maps message ID -> (number, author ID) and keeps a number -> message count
+    index so both lookups are O(1)."""
+
+    __slots__ = ("maxlen", "_messages", "_numbers")
+
+    def __init__(self, maxlen: int = _RECENT_SIZE):
+        self.maxlen = maxlen
+        self._messages: typing.OrderedDict[int, typing.Tuple[int, int]] = OrderedDict()
+        self._numbers: typing.Dict[int, int] = {}
+
+    def add(self, message_id: int, number: int, author_id: int):
+        if message_id in self._messages:
+            return
+        self._messages[message_id] = (number, author_id)
+        self._numbers[number] = self._numbers.get(number, 0) + 1
+        if len(self._messages) > self.maxlen:
+            _, (old_number, _) = self._messages.popitem(last=False)
+            self._forget_number(old_number)
+
+    def pop(self, message_id: int) -> typing.Optional[typing.Tuple[int, int]]:
+        entry = self._messages.pop(message_id, None)
+        if entry is not None:
+            self._forget_number(entry[0])
+        return entry
+
+    def has_number(self, number: int) -> bool:
+        return number in self._numbers
+
+    def clear(self):
+        self._messages.clear()
+        self._numbers.clear()
+
+    def _forget_number(self, number: int):
+        left = self._numbers[number] - 1
+        if left:
+            self._numbers[number] = left
+        else:
+            del self._numbers[number]
+
+
+class DeletionQueue:
+    """Deletes a channel's rejected messages and expired warnings in bulk.
+
+    Only one warning is kept alive per channel, repeated warnings edit it
+    instead of sending a new message."""
+
+    def __init__(self, channel: discord.TextChannel):
+        self.channel = channel
+        self.warning: typing.Optional[discord.Message] = None
+        self._pending: typing.List[discord.Message] = []
+        self._expiring: typing.List[typing.Tuple[float, int, discord.Message]] = []
+        self._expiries: typing.Dict[int, float] = {}
+        self._counter = itertools.count()
+        self._warn_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: typing.Optional[asyncio.Task] = None
+
+    def delete(self, message: discord.Message):
+        self._pending.append(message)
+        self._wakeup.set()
+        self._ensure_running()
+
+    def delete_later(self, message: discord.Message, seconds: int):
+        expiry = time.monotonic() + seconds
+        self._expiries[message.id] = expiry
+        heapq.heappush(self._expiring, (expiry, next(self._counter), message))
+        self._ensure_running()
+
+    async def warn(self, content: str, seconds: int):
+        async with self._warn_lock:
+            if self.warning is not None:
+                if self.warning.content != content:
+                    try:
+                        await self.warning.edit(content=content)
+                    except discord.NotFound:
+                        self.warning = None
+            if self.warning is None:
+                self.warning = await self.channel.send(content)
+            if seconds != 0:
+                self.delete_later(self.warning, seconds)
+
+    def release_warning(self):
+        """Stop collapsing warnings into the current one, e.g. after a valid count."""
+        self.warning = None
+
+    async def drain(self):
+        """Delete everything that is queued, including warnings that haven't expired yet."""
+        if self._task:
+            self._task.cancel()
+        self._pending.extend(message for _, _, message in self._expiring)
+        self._expiring.clear()
+        self._expiries.clear()
+        while self._pending:
+            await self._delete_batch()
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._pending or self._expiring:
+            if not self._pending:
+                timeout = max(self._expiring[0][0] - time.monotonic(), 0)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            await asyncio.sleep(_DELETE_DELAY)
+            now = time.monotonic()
+            while self._expiring and self._expiring[0][0] <= now:
+                expiry, _, message = heapq.heappop(self._expiring)
+                if self._expiries.get(message.id) != expiry:
+                    continue  # the warning was refreshed, a newer entry exists
+                del self._expiries[message.id]
+                if message is self.warning:
+                    self.warning = None
+                self._pending.append(message)
+            while self._pending:
+                await self._delete_batch()
+
+    async def _delete_batch(self):
+        batch = self._pending[:_BULK_LIMIT]
+        del self._pending[:_BULK_LIMIT]
+        try:
+            await self.channel.delete_messages(batch)
+        except (discord.Forbidden, discord.NotFound):
+            pass
+        except discord.HTTPException:
+            # bulk deletion refuses the whole batch if a single message is too old or gone
+            for message in batch:
+                try:
+                    await message.delete()
+                except (discord.Forbidden, discord.NotFound):
+                    pass
+
+
+class CountingStats:
+    """Per-member counting statistics of a channel.
+
+    Every member has `[counts, streak, best streak]`, a streak ends
+    with a rejected message. The ranking is kept sorted so the top
+    can be read without sorting."""
+
+    __slots__ = ("members", "_ranking")
+
+    def __init__(self, data: dict):
+        self.members: typing.Dict[int, typing.List[int]] = {
+            int(member_id): list(entry) for member_id, entry in data.items()
+        }
+        self._ranking = sorted(
+            (-entry[0], member_id) for member_id, entry in self.members.items()
+        )
+
+    def count(self, member_id: int):
+        entry = self.members.get(member_id)
+        if entry is None:
+            entry = self.members[member_id] = [0, 0, 0]
+        else:
+            self._unrank(member_id, entry)
+        entry[0] += 1
+        entry[1] += 1
+        entry[2] = max(entry[2], entry[1])
+        bisect.insort(self._ranking, (-entry[0], member_id))
+
+    def miss(self, member_id: int) -> bool:
+        entry = self.members.get(member_id)
+        if not entry or not entry[1]:
+            return False
+        entry[1] = 0
+        return True
+
+    def remove(self, member_id: int) -> bool:
+        entry = self.members.pop(member_id, None)
+        if entry is None:
+            return False
+        self._unrank(member_id, entry)
+        return True
+
+    def rank(self, member_id: int) -> typing.Optional[int]:
+        entry = self.members.get(member_id)
+        if entry is None:
+            return None
+        return bisect.bisect_left(self._ranking, (-entry[0], member_id)) + 1
+
+    def top(self, k: int) -> typing.List[typing.Tuple[int, typing.List[int]]]:
+        return [
+            (member_id, self.members[member_id]) for _, member_id in self._ranking[:k]
+        ]
+
+    def to_dict(self) -> dict:
+        return {str(member_id): entry for member_id, entry in self.members.items()}
+
+    def _unrank(self, member_id: int, entry: typing.List[int]):
+        del self._ranking[bisect.bisect_left(self._ranking, (-entry[0], member_id))]
+
+
+class CountingState:
+    """In-memory copy of a counting channel's settings and progress.
+
+    `previous` and `last` are written back to Config lazily,
+    `unsaved` tracks how many counts haven't been persisted yet."""
+
+    __slots__ = (
+        "guild",
+        "channel",
+        "previous",
+        "last",
+        "goal",
+        "whitelist",
+        "warning",
+        "seconds",
+        "unsaved",
+        "recent",
+        "stats",
+    )
+
+    def __init__(self, guild_id: int, channel_id: int, data: dict):
+        data = {**_CHANNEL_DEFAULTS, **data}
+        self.guild = guild_id
+        self.channel = channel_id
+        self.previous = data["previous"]
+        self.last = data["last"]
+        self.goal = data["goal"]
+        self.whitelist = data["whitelist"]
+        self.warning = data["warning"]
+        self.seconds = data["seconds"]
+        self.unsaved = 0
+        self.recent = RecentCounts()
+        self.stats = CountingStats(data.get("stats", {}))
+
+    def to_dict(self) -> dict:
+        return {
+            "previous": self.previous,
+            "last": self.last,
+            "goal": self.goal,
+            "whitelist": self.whitelist,
+            "warning": self.warning,
+            "seconds": self.seconds,
+            "stats": self.stats.to_dict(),
+        }
+
 
 class Counting(commands.Cog):
     """
     Make a counting channel with goals.
     """
 
-    __version__ = "1.4.0"
+    __version__ = "1.6.0"
 
     def __init__(self, bot: Red):
         self.bot = bot
@@ -24,6 +298,9 @@ class Counting(commands.Cog):
         )
 
         self.config.register_guild(
+            channels={},  # {'channel_id': {'previous': 0, 'last': 0, 'goal': 0, ...}}
+            allow_text=False,
+            # single channel settings from before 1.6.0, migrated into `channels`
             channel=0,
             previous=0,
             goal=0,
@@ -31,13 +308,41 @@ class Counting(commands.Cog):
             whitelist=None,
             warning=False,
             seconds=0,
-            allow_text=False,
         )
 
+        self._states: typing.Dict[int, CountingState] = {}
+        self._deletion_queues: typing.Dict[int, DeletionQueue] = {}
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        self._reconcile_task: typing.Optional[asyncio.Task] = None
+
+    async def initialize(self):
+        for guild_id, data in (await self.config.all_guilds()).items():
+            channels = data["channels"]
+            if data["channel"]:
+                channels = await self._migrate_guild(guild_id, data)
+            for channel_id, channel_data in channels.items():
+                channel_id = int(channel_id)
+                self._states[channel_id] = CountingState(
+                    guild_id, channel_id, channel_data
+                )
+        self._reconcile_task = asyncio.create_task(self._reconcile_all())
+
+    def cog_unload(self):
+        self._flush_task.cancel()
+        if self._reconcile_task:
+            self._reconcile_task.cancel()
+        asyncio.create_task(self._flush_all())
+        for queue in self._deletion_queues.values():
+            asyncio.create_task(queue.drain())
+
     async def red_delete_data_for_user(self, *, requester, user_id):
-        for guild in self.bot.guilds:
-            if user_id == await self.config.guild(guild).last():
-                await self.config.guild(guild).last.clear()
+        for state in list(self._states.values()):
+            removed = state.stats.remove(user_id)
+            if state.last == user_id:
+                state.last = 0
+                removed = True
+            if removed:
+                await self._flush(state, force=True)
 
     def format_help_for_context(self, ctx: commands.Context) -> str:
         context = super().format_help_for_context(ctx)
@@ -48,88 +353,131 @@ class Counting(commands.Cog):
     @commands.group(autohelp=True, aliases=["counting"])
     @commands.guild_only()
     async def countset(self, ctx: commands.Context):
-        """Various Counting settings."""
+        """Various Counting settings.
+
+        Most settings take an optional channel, when it's not provided
+        the current channel (or the only counting channel) is used."""
 
-    @countset.command(name="channel")
+    @countset.command(name="channel", aliases=["add"])
     async def countset_channel(
-        self, ctx: commands.Context, channel: typing.Optional[discord.TextChannel]
+        self, ctx: commands.Context, channel: discord.TextChannel
     ):
-        """Set the counting channel.
-
-        If channel isn't provided, it will delete the current channel."""
-        if not channel:
-            await self.config.guild(ctx.guild).channel.set(0)
-            return await ctx.send("Channel removed.")
-        await self.config.guild(ctx.guild).channel.set(channel.id)
-        goal = await self.config.guild(ctx.guild).goal()
+        """Add a counting channel."""
+        if channel.id in self._states:
+            return await ctx.send(f"{channel.name} is already a counting channel.")
+        state = CountingState(ctx.guild.id, channel.id, {})
+        await self.config.guild(ctx.guild).channels.set_raw(
+            str(channel.id), value=state.to_dict()
+        )
+        self._states[channel.id] = state
         await ctx.send(f"{channel.name} has been set for counting.")
 
+    @countset.command(name="remove")
+    async def countset_remove(
+        self, ctx: commands.Context, channel: discord.TextChannel
+    ):
+        """Remove a counting channel."""
+        if channel.id not in self._states:
+            return await ctx.send(f"{channel.name} isn't a counting channel.")
+        del self._states[channel.id]
+        self._deletion_queues.pop(channel.id, None)
+        await self.config.guild(ctx.guild).channels.clear_raw(str(channel.id))
+        await ctx.send("Channel removed.")
+
     @countset.command(name="goal")
-    async def countset_goal(self, ctx: commands.Context, goal: int = 0):
+    async def countset_goal(
+        self,
+        ctx: commands.Context,
+        channel: typing.Optional[discord.TextChannel],
+        goal: int = 0,
+    ):
         """Set the counting goal.
 
         If goal isn't provided, it will be deleted."""
+        state = await self._resolve_state(ctx, channel)
+        if not state:
+            return
+        state.goal = goal
+        await self._flush(state, force=True)
         if not goal:
-            await self.config.guild(ctx.guild).goal.clear()
             return await ctx.send("Goal removed.")
-        await self.config.guild(ctx.guild).goal.set(goal)
         await ctx.send(f"Goal set to {goal}.")
 
     @countset.command(name="start")
-    async def countset_start(self, ctx: commands.Context, number: int):
+    async def countset_start(
+        self,
+        ctx: commands.Context,
+        channel: typing.Optional[discord.TextChannel],
+        number: int,
+    ):
         """Set the starting number."""
-        channel = ctx.guild.get_channel(await self.config.guild(ctx.guild).channel())
+        state = await self._resolve_state(ctx, channel)
+        if not state:
+            return
+        channel = ctx.guild.get_channel(state.channel)
         if not channel:
-            return await ctx.send(
-                f"Set the channel with `{ctx.clean_prefix}countset channel <channel>`, please."
-            )
-        await self.config.guild(ctx.guild).previous.set(number)
-        await self.config.guild(ctx.guild).last.clear()
-        goal = await self.config.guild(ctx.guild).goal()
-        next_number = number + 1
-        await channel.send(number)
+            return await ctx.send("Uh oh, I can't find the counting channel.")
+        state.previous = number
+        state.last = 0
+        state.recent.clear()
+        await self._flush(state, force=True)
+        sent = await channel.send(number)
+        state.recent.add(sent.id, number, sent.author.id)
         if channel.id != ctx.channel.id:
             await ctx.send(f"Counting start set to {number}.")
 
     @countset.command(name="reset")
-    async def countset_reset(self, ctx: commands.Context, confirmation: bool = False):
+    async def countset_reset(
+        self,
+        ctx: commands.Context,
+        channel: typing.Optional[discord.TextChannel],
+        confirmation: bool = False,
+    ):
         """Reset the counter and start from 0 again!"""
         if not confirmation:
             return await ctx.send(
                 "This will reset the ongoing counting. This action **cannot** be undone.\n"
-                f"If you're sure, type `{ctx.clean_prefix}countset reset yes`."
+                f"If you're sure, type `{ctx.clean_prefix}countset reset [channel] yes`."
             )
-        p = await self.config.guild(ctx.guild).previous()
-        if p == 0:
+        state = await self._resolve_state(ctx, channel)
+        if not state:
+            return
+        if state.previous == 0:
             return await ctx.send("The counting hasn't even started.")
-        c = ctx.guild.get_channel(await self.config.guild(ctx.guild).channel())
+        c = ctx.guild.get_channel(state.channel)
         if not c:
-            return await ctx.send(
-                f"Set the channel with `{ctx.clean_prefix}countchannel <channel>`, please."
-            )
-        await self.config.guild(ctx.guild).previous.clear()
-        await self.config.guild(ctx.guild).last.clear()
-        await c.send("Counting has been reset.")
-        goal = await self.config.guild(ctx.guild).goal()
+            return await ctx.send("Uh oh, I can't find the counting channel.")
+        state.previous = 0
+        state.last = 0
+        state.recent.clear()
+        await self._flush(state, force=True)
+        await c.send(_RESET_MESSAGE)
         if c.id != ctx.channel.id:
-            await ctx.send("Counting has been reset.")
+            await ctx.send(_RESET_MESSAGE)
 
     @countset.command(name="role")
     async def countset_role(
-        self, ctx: commands.Context, role: typing.Optional[discord.Role]
+        self,
+        ctx: commands.Context,
+        channel: typing.Optional[discord.TextChannel],
+        role: typing.Optional[discord.Role],
     ):
         """Add a whitelisted role."""
+        state = await self._resolve_state(ctx, channel)
+        if not state:
+            return
+        state.whitelist = role.id if role else None
+        await self._flush(state, force=True)
         if not role:
-            await self.config.guild(ctx.guild).whitelist.clear()
             await ctx.send(f"Whitelisted role has been deleted.")
         else:
-            await self.config.guild(ctx.guild).whitelist.set(role.id)
             await ctx.send(f"{role.name} has been whitelisted.")
 
     @countset.command(name="warnmsg")
     async def countset_warnmsg(
         self,
         ctx: commands.Context,
+        channel: typing.Optional[discord.TextChannel],
         on_off: typing.Optional[bool],
         seconds: typing.Optional[int],
     ):
@@ -137,8 +485,11 @@ class Counting(commands.Cog):
 
         If `on_off` is not provided, the state will be flipped.
         Optionally add how many seconds the bot should wait before deleting the message (0 for not deleting)."""
-        target_state = on_off or not (await self.config.guild(ctx.guild).warning())
-        await self.config.guild(ctx.guild).warning.set(target_state)
+        state = await self._resolve_state(ctx, channel)
+        if not state:
+            return
+        target_state = on_off or not state.warning
+        state.warning = target_state
         if target_state:
             if not seconds or seconds < 0:
                 seconds = 0
@@ -147,103 +498,317 @@ class Counting(commands.Cog):
                 await ctx.send(
                     f"Warning messages are now enabled, will be deleted after {seconds} seconds."
                 )
-            await self.config.guild(ctx.guild).seconds.set(seconds)
+            state.seconds = seconds
         else:
             await ctx.send("Warning messages are now disabled.")
+        await self._flush(state, force=True)
+
+    @countset.command(name="reconcile")
+    async def countset_reconcile(
+        self, ctx: commands.Context, channel: typing.Optional[discord.TextChannel]
+    ):
+        """Rebuild the counter from the channel's message history.
+
+        Useful if the next number doesn't match what's in the channel."""
+        state = await self._resolve_state(ctx, channel)
+        if not state:
+            return
+        async with ctx.typing():
+            found = await self._reconcile(state)
+        if not found:
+            return await ctx.send("Uh oh, I couldn't find any valid counting.")
+        await ctx.send(f"Done, the next number is {state.previous + 1}.")
 
     @countset.command(name="settings")
     async def countset_settings(self, ctx: commands.Context):
         """See current settings."""
-        data = await self.config.guild(ctx.guild).all()
-        channel = ctx.guild.get_channel(data["channel"])
-        channel = channel.mention if channel else "None"
-
-        goal = "None" if data["goal"] == 0 else str(data["goal"])
-
-        role = ctx.guild.get_role(data["whitelist"])
-        role = role.name if role else "None"
-
-        warn = "Disabled" if data["warning"] else f"Enabled ({data['seconds']} s)"
-
         embed = discord.Embed(
             colour=await ctx.embed_colour(), timestamp=datetime.datetime.now()
         )
         embed.set_author(name=ctx.guild.name, icon_url=ctx.guild.icon_url)
         embed.title = "**__Counting settings:__**"
-        embed.set_footer(text="*required to function properly")
 
-        embed.add_field(name="Channel*:", value=channel)
-        embed.add_field(name="Whitelisted role:", value=role)
-        embed.add_field(name="Warning message:", value=warn)
-        embed.add_field(name="Next number:", value=str(data["previous"] + 1))
-        embed.add_field(name="Goal:", value=goal)
+        states = self._guild_states(ctx.guild)
+        if not states:
+            embed.description = (
+                f"No counting channels, add one with `{ctx.clean_prefix}countset channel <channel>`."
+            )
+        for state in states[:25]:
+            channel = ctx.guild.get_channel(state.channel)
+            role = ctx.guild.get_role(state.whitelist) if state.whitelist else None
+            goal = "None" if state.goal == 0 else str(state.goal)
+            warn = f"Enabled ({state.seconds} s)" if state.warning else "Disabled"
+            embed.add_field(
+                name=f"#{channel.name}" if channel else str(state.channel),
+                value=(
+                    f"Next number: {state.previous + 1}\n"
+                    f"Goal: {goal}\n"
+                    f"Whitelisted role: {role.name if role else 'None'}\n"
+                    f"Warning message: {warn}"
+                ),
+            )
 
         await ctx.send(embed=embed)
 
+    @commands.command()
+    @commands.guild_only()
+    async def countstats(
+        self,
+        ctx: commands.Context,
+        channel: typing.Optional[discord.TextChannel],
+        *,
+        member: typing.Optional[discord.Member],
+    ):
+        """See how many numbers you (or someone else) have counted."""
+        state = await self._resolve_state(ctx, channel)
+        if not state:
+            return
+        member = member or ctx.author
+        entry = state.stats.members.get(member.id)
+        if not entry:
+            return await ctx.send(f"{member.display_name} hasn't counted yet.")
+        counts, streak, best = entry
+        await ctx.send(
+            f"**{member.display_name}** (#{state.stats.rank(member.id)})\n"
+            f"*Counted:* {counts}\n*Current streak:* {streak}\n*Longest streak:* {best}"
+        )
+
+    @commands.command()
+    @commands.guild_only()
+    async def counttop(
+        self, ctx: commands.Context, channel: typing.Optional[discord.TextChannel]
+    ):
+        """Display the members that counted the most."""
+        state = await self._resolve_state(ctx, channel)
+        if not state:
+            return
+        top = state.stats.top(_TOP_SIZE)
+        if not top:
+            return await ctx.send(box("Nothing to see here.", lang="md"))
+        pound_len = len(str(len(top)))
+        counts_len = len(str(top[0][1][0]))
+        lines = [
+            "{pound:{pound_len}}{score:{score_len}}{best:8}{name:2}".format(
+                pound="#",
+                score="Counts",
+                best="Best",
+                name="Name",
+                pound_len=pound_len + 3,
+                score_len=max(counts_len, 6) + 2,
+            )
+        ]
+        for pos, (member_id, (counts, _, best)) in enumerate(top, 1):
+            member = ctx.guild.get_member(member_id)
+            name = member.display_name if member else str(member_id)
+            if member_id == ctx.author.id:
+                name = f"<<{name}>>"
+            lines.append(
+                f"{f'{pos}.': <{pound_len+3}}{counts: <{max(counts_len, 6)+2}}{best: <8}{name}"
+            )
+        await ctx.send(box("\n".join(lines), lang="md"))
+
     @commands.Cog.listener()
     async def on_message(self, message):
-        if not message.guild or message.author.id == self.bot.user.id:
-            return
-        if message.channel.id != await self.config.guild(message.guild).channel():
+        state = self._states.get(message.channel.id)
+        if not state or not message.guild or message.author.id == self.bot.user.id:
             return
-        last_id = await self.config.guild(message.guild).last()
-        previous = await self.config.guild(message.guild).previous()
+        last_id = state.last
+        previous = state.previous
         next_number = previous + 1
-        goal = await self.config.guild(message.guild).goal()
-        warning = await self.config.guild(message.guild).warning()
-        seconds = await self.config.guild(message.guild).seconds()
         if message.author.id != last_id:
             try:
                 now = int(message.content)
                 if now - 1 == previous:
-                    await self.config.guild(message.guild).previous.set(now)
-                    await self.config.guild(message.guild).last.set(message.author.id)
-                    n = now + 1
+                    state.previous = now
+                    state.last = message.author.id
+                    state.recent.add(message.id, now, message.author.id)
+                    state.stats.count(message.author.id)
+                    queue = self._deletion_queues.get(message.channel.id)
+                    if queue:
+                        queue.release_warning()
+                    state.unsaved += 1
+                    if state.unsaved >= _MAX_UNSAVED:
+                        await self._flush(state)
                     return
             except (TypeError, ValueError):
                 pass
-        rid = await self.config.guild(message.guild).whitelist()
-        if rid:
-            role = message.guild.get_role(int(rid))
+        if state.whitelist:
+            role = message.guild.get_role(int(state.whitelist))
             if role and role in message.author.roles:
                 return
-        if warning:
+        if state.stats.miss(message.author.id):
+            state.unsaved += 1
+        queue = self._get_deletion_queue(message.channel)
+        queue.delete(message)
+        if state.warning:
             if message.author.id != last_id:
-                warn_msg = await message.channel.send(
-                    f"The next message in this channel must be {next_number}"
+                await queue.warn(
+                    f"The next message in this channel must be {next_number}",
+                    state.seconds,
                 )
             else:
-                warn_msg = await message.channel.send(
-                    f"You cannot count twice in a row."
-                )
-            if seconds != 0:
-                await asyncio.sleep(seconds)
-                await warn_msg.delete()
-        try:
-            await message.delete()
-        except (discord.Forbidden, discord.NotFound):
-            pass
+                await queue.warn(f"You cannot count twice in a row.", state.seconds)
 
     @commands.Cog.listener()
     async def on_message_delete(self, message):
-        if not message.guild:
-            return
-        if message.channel.id != await self.config.guild(message.guild).channel():
+        state = self._states.get(message.channel.id)
+        if not state or not message.guild:
             return
         try:
             deleted = int(message.content)
-            previous = await self.config.guild(message.guild).previous()
-            goal = await self.config.guild(message.guild).goal()
-            if deleted == previous:
-                s = str(deleted)
-                if goal == 0:
-                    msgs = await message.channel.history(limit=100).flatten()
-                else:
-                    msgs = await message.channel.history(limit=goal).flatten()
-                msg = find(lambda m: m.content == s, msgs)
-                if not msg:
-                    p = deleted - 1
-                    await self.config.guild(message.guild).previous.set(p)
-                    await message.channel.send(deleted)
         except (TypeError, ValueError):
             return
+        entry = state.recent.pop(message.id)
+        if deleted != state.previous or state.recent.has_number(deleted):
+            return
+        if entry is None:
+            # not one of the remembered counts, most likely a rejected duplicate
+            # or a count from before the cog was loaded, so double check
+            s = str(deleted)
+            msgs = await message.channel.history(limit=_HISTORY_FALLBACK).flatten()
+            msg = find(lambda m: m.content == s, msgs)
+            if msg:
+                state.recent.add(msg.id, deleted, msg.author.id)
+                return
+        state.previous = deleted - 1
+        await self._flush(state, force=True)
+        sent = await message.channel.send(deleted)
+        state.recent.add(sent.id, deleted, sent.author.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        if self._states.pop(channel.id, None):
+            await self.config.guild(channel.guild).channels.clear_raw(str(channel.id))
+        self._deletion_queues.pop(channel.id, None)
+
+    async def _iter_counts(
+        self, channel: discord.TextChannel
+    ) -> typing.AsyncIterator[typing.Tuple[discord.Message, int]]:
+        """Stream the numbers in a channel, newest first.
+
+        Stops at the last reset, older numbers don't matter anymore."""
+        async for message in channel.history(limit=_RECONCILE_SCAN):
+            if message.author.id == self.bot.user.id and message.content == _RESET_MESSAGE:
+                return
+            try:
+                yield message, int(message.content)
+            except (TypeError, ValueError):
+                continue
+
+    async def _reconcile(self, state: CountingState) -> bool:
+        """Rebuild a channel's recent counts from its history, and its counter if needed.
+
+        Only the newest run of counts is used. It replaces the saved counter when it
+        agrees with it, starts at a number the bot sent (`[p]countset start`),
+        or is long enough to be trusted over it.
+        Returns whether the run was used."""
+        channel = self.bot.get_channel(state.channel)
+        if not channel:
+            return False
+        before = state.previous
+        run: typing.List[typing.Tuple[discord.Message, int]] = []
+        anchored = False
+        async for message, number in self._iter_counts(channel):
+            if run:
+                newer, newer_number = run[-1]
+                if number != newer_number - 1 or message.author.id == newer.author.id:
+                    break
+            run.append((message, number))
+            if message.author.id == self.bot.user.id:
+                # the counting was started here, older numbers don't matter
+                anchored = True
+                break
+            if len(run) >= state.recent.maxlen:
+                break
+        if not run:
+            return False
+        if state.previous != before:
+            return True  # somebody counted in the meantime, live data wins
+        latest, latest_number = run[0]
+        agrees = run[-1][1] - 1 <= before <= latest_number
+        if not (agrees or anchored or len(run) >= _RECONCILE_RUN):
+            return False  # too few counts to contradict the saved counter
+        state.previous = latest_number
+        state.last = latest.author.id
+        state.recent.clear()
+        for message, number in reversed(run):
+            state.recent.add(message.id, number, message.author.id)
+        if latest_number != before:
+            await self._flush(state, force=True)
+        return True
+
+    async def _reconcile_all(self):
+        await self.bot.wait_until_red_ready()
+        semaphore = asyncio.Semaphore(_RECONCILE_CONCURRENCY)
+
+        async def reconcile(state):
+            async with semaphore:
+                try:
+                    await self._reconcile(state)
+                except (discord.Forbidden, discord.HTTPException):
+                    pass
+
+        await asyncio.gather(*(reconcile(state) for state in list(self._states.values())))
+
+    def _guild_states(self, guild: discord.Guild) -> typing.List[CountingState]:
+        return [state for state in self._states.values() if state.guild == guild.id]
+
+    async def _resolve_state(
+        self, ctx: commands.Context, channel: typing.Optional[discord.TextChannel]
+    ) -> typing.Optional[CountingState]:
+        if channel:
+            state = self._states.get(channel.id)
+            if not state:
+                await ctx.send(f"{channel.name} isn't a counting channel.")
+            return state
+        state = self._states.get(ctx.channel.id)
+        if state:
+            return state
+        states = self._guild_states(ctx.guild)
+        if len(states) == 1:
+            return states[0]
+        if not states:
+            await ctx.send(
+                f"Set the channel with `{ctx.clean_prefix}countset channel <channel>`, please."
+            )
+        else:
+            await ctx.send(
+                "This server has multiple counting channels, please specify one."
+            )
+        return None
+
+    async def _migrate_guild(self, guild_id: int, data: dict) -> dict:
+        channels = data["channels"]
+        channels.setdefault(
+            str(data["channel"]), {key: data[key] for key in _CHANNEL_DEFAULTS}
+        )
+        conf = self.config.guild_from_id(guild_id)
+        await conf.channels.set(channels)
+        for key in _LEGACY_KEYS:
+            await conf.get_attr(key).clear()
+        return channels
+
+    def _get_deletion_queue(self, channel: discord.TextChannel) -> DeletionQueue:
+        queue = self._deletion_queues.get(channel.id)
+        if queue is None:
+            queue = self._deletion_queues[channel.id] = DeletionQueue(channel)
+        return queue
+
+    async def _flush(self, state: CountingState, force: bool = False):
+        if not state.unsaved and not force:
+            return
+        state.unsaved = 0
+        if self._states.get(state.channel) is not state:
+            return  # the channel has been removed in the meantime
+        await self.config.guild_from_id(state.guild).channels.set_raw(
+            str(state.channel), value=state.to_dict()
+        )
+
+    async def _flush_all(self):
+        for state in list(self._states.values()):
+            await self._flush(state)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(_FLUSH_INTERVAL)
+            await self._flush_all()
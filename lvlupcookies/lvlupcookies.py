@@ -90,9 +90,4 @@ class LevelUpCookies(commands.Cog):
                 return
         except KeyError:
             return
-        cookies = await self.bot.get_cog("Cookies").config.member(user).cookies()
-        if cookies != 0:
-            new_cookies = cookies + int(reward.get("cookies"))
-        else:
-            new_cookies = int(reward.get("cookies"))
-        await self.bot.get_cog("Cookies").config.member(user).cookies.set(new_cookies)
+        await self.bot.get_cog("Cookies").deposit_cookies(user, int(reward.get("cookies")))
@@ -13,6 +13,7 @@ async def setup_after_ready(bot):
             for alias in command.aliases:
                 if bot.get_command(alias):
                     command.aliases[command.aliases.index(alias)] = f"m{alias}"
+    await cog.initialize()
     bot.add_cog(cog)
 
 def setup(bot):
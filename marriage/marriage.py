@@ -4,7 +4,7 @@ import random
 import datetime
 import typing
 
-from redbot.core import Config, checks, commands, bank
+from redbot.core import Config, checks, commands, bank, errors
 from redbot.core.utils.chat_formatting import humanize_list, box
 from redbot.core.utils.predicates import MessagePredicate
 
@@ -68,6 +68,15 @@ class Marriage(commands.Cog):
         self.config.register_member(**default_user)
         self.config.register_user(**default_user)
 
+        self._is_global = False  # loaded by initialize, changed by the gg command
+
+    async def initialize(self):
+        self._is_global = await self.config.is_global()
+
+    def is_global(self) -> bool:
+        """Whether the cog is global, without reading Config."""
+        return self._is_global
+
     async def red_delete_data_for_user(self, *, requester, user_id):
         await self.config.user_from_id(user_id).clear()
         for guild in self.bot.guilds:
@@ -146,7 +155,7 @@ class Marriage(commands.Cog):
         confirmation: typing.Optional[bool],
     ):
         """Switch from per-guild to global marriage and vice versa."""
-        if await self.config.is_global() == make_global:
+        if self.is_global() == make_global:
             return await ctx.send("Uh oh, you're not really changing anything.")
         if not confirmation:
             return await ctx.send(
@@ -158,6 +167,7 @@ class Marriage(commands.Cog):
         await self.config.clear_all_guilds()
         await self.config.clear_all_globals()
         await self.config.is_global.set(make_global)
+        self._is_global = make_global
         await ctx.send(f"Marriage is now {'global' if make_global else 'per-guild'}.")
 
     @marryset.command(name="toggle")
@@ -221,7 +231,7 @@ class Marriage(commands.Cog):
     @marryset.command(name="settings")
     async def marryset_settings(self, ctx: commands.Context):
         """See current settings."""
-        is_global = await self.config.is_global()
+        is_global = self.is_global()
         conf = await self._get_conf_group(ctx.guild)
         data = (
             await self.config.all()
@@ -648,9 +658,7 @@ price:: {data.get('price')}""",
             await bank.withdraw_credits(member, amount)
         else:
             end_amount = f"{amount} :cookie:"
-            if not await self._can_spend_cookies(
-                ctx.author, amount
-            ) or not await self._can_spend_cookies(member, amount):
+            if not await self._can_spend_many_cookies([ctx.author, member], amount):
                 return await ctx.send(f"Uh oh, you two cannot afford this...")
             await self._withdraw_cookies(ctx.author, amount)
             await self._withdraw_cookies(member, amount)
@@ -730,9 +738,9 @@ price:: {data.get('price')}""",
                     await bank.withdraw_credits(member, amount)
                 else:
                     end_amount = f"You both paid {amount} :cookie:"
-                    if not await self._can_spend_cookies(
-                        ctx.author, amount
-                    ) or not await self._can_spend_cookies(member, amount):
+                    if not await self._can_spend_many_cookies(
+                        [ctx.author, member], amount
+                    ):
                         return await ctx.send(
                             f"Uh oh, you two cannot afford this... But you can force a court by "
                             f"doing `{ctx.clean_prefix}divorce {member.mention} yes`"
@@ -754,8 +762,9 @@ price:: {data.get('price')}""",
                 await bank.withdraw_credits(ctx.author, aamount)
                 await bank.withdraw_credits(member, tamount)
             else:
-                author_cookies = await self._get_cookies(ctx.author)
-                target_cookies = await self._get_cookies(member)
+                balances = await self._get_many_cookies([ctx.author, member])
+                author_cookies = balances[ctx.author.id]
+                target_cookies = balances[member.id]
                 aamount = int(round(author_cookies * court_multiplier))
                 tamount = int(round(target_cookies * court_multiplier))
                 end_amount = f"{ctx.author.name} paid {aamount} :cookie:, {member.name} paid {tamount} :cookie:"
@@ -879,7 +888,7 @@ price:: {data.get('price')}""",
             for sid in spouses:
                 spouse = (
                     self.bot.get_user(sid)
-                    if await self.config.is_global()
+                    if self.is_global()
                     else ctx.guild.get_member(sid)
                 )
                 endtext = await self._maybe_divorce(ctx, spouse, endtext, contentment)
@@ -957,7 +966,7 @@ price:: {data.get('price')}""",
             for sid in spouses:
                 spouse = (
                     self.bot.get_user(sid)
-                    if await self.config.is_global()
+                    if self.is_global()
                     else ctx.guild.get_member(sid)
                 )
                 endtext = await self._maybe_divorce(ctx, spouse, endtext, contentment)
@@ -1018,14 +1027,20 @@ price:: {data.get('price')}""",
     async def _get_cookies(self, user):
         return await self.bot.get_cog("Cookies").get_cookies(user)
 
+    async def _get_many_cookies(self, users):
+        return await self.bot.get_cog("Cookies").get_many_cookies(users)
+
     async def _can_spend_cookies(self, user, amount):
         return bool(await self.bot.get_cog("Cookies").can_spend(user, amount))
 
+    async def _can_spend_many_cookies(self, users, amount):
+        return await self.bot.get_cog("Cookies").can_spend_many(users, amount)
+
     async def _withdraw_cookies(self, user, amount):
         return await self.bot.get_cog("Cookies").withdraw_cookies(user, amount)
 
-    async def _deposit_cookies(self, user, amount):
-        return await self.bot.get_cog("Cookies").deposit_cookies(user, amount)
+    async def _transfer_cookies(self, src, dst, amount):
+        return await self.bot.get_cog("Cookies").transfer(src, dst, amount)
 
     async def _maybe_divorce(self, ctx, spouse, endtext, contentment):
         conf = await self._get_conf_group(ctx.guild)
@@ -1051,29 +1066,35 @@ price:: {data.get('price')}""",
             if len(await m_conf(spouse).current()) == 0:
                 await m_conf(spouse).married.set(False)
                 await m_conf(spouse).divorced.set(True)
+            took_money = True
             if await conf.currency() == 0:
                 abal = await bank.get_balance(ctx.author)
                 await bank.withdraw_credits(ctx.author, abal)
                 await bank.deposit_credits(spouse, abal)
             else:
                 author_cookies = await self._get_cookies(ctx.author)
-                await self._withdraw_cookies(ctx.author, author_cookies)
-                await self._deposit_cookies(spouse, author_cookies)
-            endtext = f"{endtext}\n:broken_heart: {ctx.author.mention} has made {spouse.mention} completely unhappy "
-            f"with their actions so {spouse.mention} left them and took all their money!"
+                try:
+                    await self._transfer_cookies(ctx.author, spouse, author_cookies)
+                except (ValueError, errors.BalanceTooHigh):
+                    took_money = False
+            endtext = (
+                f"{endtext}\n:broken_heart: {ctx.author.mention} has made {spouse.mention} completely unhappy "
+                f"with their actions so {spouse.mention} left them"
+            )
+            endtext += " and took all their money!" if took_money else "!"
         return endtext
 
     async def _get_conf_group(self, guild):
         return (
-            self.config if await self.config.is_global() else self.config.guild(guild)
+            self.config if self.is_global() else self.config.guild(guild)
         )
 
     async def _get_user_conf(self, user):
         return (
             self.config.user(user)
-            if await self.config.is_global()
+            if self.is_global()
             else self.config.member(user)
         )
 
     async def _get_user_conf_group(self):
-        return self.config.user if await self.config.is_global() else self.config.member
+        return self.config.user if self.is_global() else self.config.member